@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    #Registra el contador de consultas de app.metrics antes de abrir cualquier conexion
+    def ready(self):
+        from . import metrics  # noqa: F401
@@ -0,0 +1,110 @@
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import exceptions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.settings import api_settings
+from . import stock_cache
+from .models import Ticket
+from .renderers import FastJsonResponse
+from .revisions import INVENTORY_ETAG, ainventory_etag, aticket_etag
+from .tickets import ticket_page, ticket_query
+
+
+#Versiones asincronas (ASGI) de las vistas JSON de lectura mas consultadas. Se montan en
+#application/urls.py en lugar de las sincronas cuando ASYNC_READ_VIEWS esta activo
+
+def async_login_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+#Autenticacion de la API equivalente a la de DRF: sesion o las clases configuradas (JWT, Basic)
+async def _api_user(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authentication_class, SessionAuthentication):
+            continue
+        result = await sync_to_async(authentication_class().authenticate)(request)
+        if result is not None:
+            return result[0]
+    return None
+
+async def get_product_stock(request, product_id):
+    stock = await stock_cache.aget_product_stock(product_id)
+    if stock is None:
+        return FastJsonResponse({'error': 'El producto no existe'}, status=404)
+    return FastJsonResponse({'stock': stock})
+
+@async_login_required
+async def inventory_consult_data(request):
+    etag = quote_etag(await ainventory_etag(request))
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+        return response
+    revision, products = await stock_cache.aget_stock_list_revision()
+    response = FastJsonResponse({'inventory': products})
+    response['ETag'] = quote_etag(INVENTORY_ETAG.format(revision))
+    return response
+
+@async_login_required
+async def get_tickets(request):
+    if request.method == 'GET':
+        try:
+            #Armar la consulta puede revisar las tablas de la base (FTS5 en SQLite) la primera vez
+            tickets, page_size = await sync_to_async(ticket_query)(request.GET)
+            return FastJsonResponse(ticket_page([ticket async for ticket in tickets], page_size))
+        except ValueError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
+    else:
+        return FastJsonResponse({'error': 'Método no permitido'}, status=405)
+
+@async_login_required
+async def get_ticket_details(request, ticket_id):
+    if request.method == 'GET':
+        etag = await aticket_etag(request, ticket_id)
+        if etag is not None:
+            etag = quote_etag(etag)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+        try:
+            ticket = await Ticket.objects.aget(id=ticket_id)
+            response = FastJsonResponse({'ticket': {
+                'id': ticket.id,
+                'type': ticket.type,
+                'description': ticket.description,
+                'status': ticket.status,
+                'created_at': ticket.created_at.strftime("%Y-%m-%d %H:%M:%S")
+            }})
+            if etag is not None:
+                response.headers['ETag'] = etag
+            return response
+        except Ticket.DoesNotExist:
+            return FastJsonResponse({'error': 'Ticket no encontrado'}, status=404)
+    else:
+        return FastJsonResponse({'error': 'Método no permitido'}, status=405)
+
+async def product_stock_api(request, pk):
+    if request.method != 'GET':
+        return FastJsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        user = await _api_user(request)
+    except exceptions.APIException as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        return FastJsonResponse(detail, status=exc.status_code)
+    if user is None:
+        return FastJsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+    stock = await stock_cache.aget_product_stock(pk)
+    if stock is None:
+        return FastJsonResponse({'detail': 'No Product matches the given query.'}, status=404)
+    return FastJsonResponse({'stock': stock})
@@ -0,0 +1,63 @@
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from . import user_cache
+
+
+#Token de login con los datos que usan los permisos de la API; el token de acceso los copia
+class InventoryRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role_id'] = user.role_id
+        token['is_active'] = user.is_active
+        token['token_version'] = user.token_version
+        return token
+
+#Usuario armado con los claims del token: request.user.role_id, .id y .is_authenticated
+#funcionan sin leer la fila del usuario
+class ClaimsUser(TokenUser):
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', False)
+
+    @cached_property
+    def role_id(self):
+        return self.token.get('role_id')
+
+    def __str__(self):
+        return f"ClaimsUser {self.id}"
+
+def _revoked():
+    return AuthenticationFailed('Token has been revoked.', code='token_revoked')
+
+#Autenticacion JWT que carga el usuario de la base y tambien respeta la revocacion por token_version
+class DatabaseJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if 'token_version' in validated_token and validated_token['token_version'] != user.token_version:
+            raise _revoked()
+        return user
+
+#Autenticacion JWT sin consulta a la base: solo compara token_version con la version vigente en
+#cache, que cambia al revocar o al modificar el rol, el estado o la contraseña del usuario.
+#Los tokens emitidos antes de agregar los claims se validan contra la base como antes
+class StatelessJWTAuthentication(DatabaseJWTAuthentication):
+    def get_user(self, validated_token):
+        if 'token_version' not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        if not validated_token.get('is_active', False):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        version = user_cache.token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if validated_token['token_version'] != version:
+            raise _revoked()
+        return ClaimsUser(validated_token)
@@ -1,4 +1,5 @@
 from .models import CustomUser
+from . import user_cache
 from django.contrib.auth.backends import BaseBackend
 
 
@@ -11,8 +12,6 @@ class EmailBackend(BaseBackend):
         except CustomUser.DoesNotExist:
             return None
 
+    #Se ejecuta en cada peticion con sesion; el usuario sale de la cache (ver user_cache)
     def get_user(self, user_id):
-        try:
-            return CustomUser.objects.get(pk=user_id)
-        except CustomUser.DoesNotExist:
-            return None
+        return user_cache.get_user(user_id)
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from .models import InventoryEntry, InventoryExit, Product
+from .serializers import BulkInventoryEntrySerializer, BulkInventoryExitSerializer
+from .reports import apply_daily_movements
+from .sales import apply_sales_deltas
+from .stock import apply_stock_deltas
+
+BULK_BATCH_SIZE = 1000
+
+
+#Ingesta masiva de movimientos: valida por lotes, inserta con bulk_create y aplica un
+#solo delta agregado por producto
+def ingest_movements(rows, model, serializer_class, quantity_field, apply_quantities):
+    errors = []
+    movements = []
+    #Una sola instancia del serializador para todas las filas evita copiar sus campos en cada una
+    serializer = serializer_class()
+    for start in range(0, len(rows), BULK_BATCH_SIZE):
+        candidates = []
+        for index, row in enumerate(rows[start:start + BULK_BATCH_SIZE], start):
+            try:
+                candidates.append((index, serializer.run_validation(row)))
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': as_serializer_error(exc)})
+        product_ids = {data['product'] for _, data in candidates}
+        existing = set(Product.objects.filter(pk__in=product_ids).values_list('id', flat=True))
+        for index, data in candidates:
+            if data['product'] in existing:
+                movements.append(data)
+            else:
+                errors.append({'index': index, 'errors': {'product': [f'Invalid pk "{data["product"]}" - object does not exist.']}})
+
+    quantities = defaultdict(int)
+    objs = []
+    for data in movements:
+        quantities[data['product']] += data[quantity_field]
+        objs.append(model(product_id=data['product'], **{quantity_field: data[quantity_field]}))
+    with transaction.atomic():
+        model.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+        apply_quantities(quantities)
+    errors.sort(key=lambda error: error['index'])
+    return len(objs), errors
+
+#Aplican las cantidades por producto de movimientos ya insertados; devuelven el stock resultante
+def apply_entry_quantities(quantities):
+    rows = apply_stock_deltas(quantities)
+    apply_daily_movements({product_id: (quantity, 0) for product_id, quantity in quantities.items()})
+    return rows
+
+def apply_exit_quantities(quantities):
+    rows = apply_stock_deltas({product_id: -quantity for product_id, quantity in quantities.items()})
+    apply_sales_deltas(quantities)
+    apply_daily_movements({product_id: (0, quantity) for product_id, quantity in quantities.items()})
+    return rows
+
+def ingest_entries(rows):
+    return ingest_movements(rows, InventoryEntry, BulkInventoryEntrySerializer, 'quantity_received', apply_entry_quantities)
+
+def ingest_exits(rows):
+    return ingest_movements(rows, InventoryExit, BulkInventoryExitSerializer, 'quantity_sold', apply_exit_quantities)
+
+#Un movimiento de un producto ya resuelto (escaner): mismo camino que la ingesta masiva, sin
+#cargar el producto. Devuelve el movimiento y el stock resultante
+def record_movement(product_id, action, quantity):
+    model, quantity_field, apply_quantities = SCAN_MOVEMENTS[action]
+    with transaction.atomic():
+        movement = model.objects.bulk_create([model(product_id=product_id, **{quantity_field: quantity})])[0]
+        rows = apply_quantities({product_id: quantity})
+        #El producto se borro despues de resolver el codigo: se revierte el movimiento
+        if not rows:
+            raise Product.DoesNotExist
+    return movement, rows[0]['stock']
+
+SCAN_MOVEMENTS = {
+    'sale': (InventoryExit, 'quantity_sold', apply_exit_quantities),
+    'entry': (InventoryEntry, 'quantity_received', apply_entry_quantities),
+}
@@ -0,0 +1,185 @@
+import csv
+import time
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from .models import Product
+from .serializers import ProductSerializer
+from .revisions import bump_inventory_revision
+from .sku_index import invalidate_index
+from .stock_cache import invalidate_products
+
+CATALOG_FIELDS = ['id', 'name', 'description', 'stock', 'min_stock', 'price', 'sku']
+UPDATE_FIELDS = ['name', 'description', 'stock', 'min_stock', 'price', 'sku']
+IMPORT_CHUNK_SIZE = 2000
+EXPORT_CHUNK_SIZE = 2000
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+#La unicidad del sku se revisa por bloque en check_skus, con una consulta y no una por fila;
+#el UniqueValidator ademas rechazaria el sku actual de un producto que se actualiza por id
+class CatalogRowSerializer(ProductSerializer):
+    class Meta(ProductSerializer.Meta):
+        extra_kwargs = {'sku': {'validators': []}}
+
+#Importacion del catalogo: el CSV se lee por bloques y cada bloque se valida con las reglas
+#de ProductSerializer. Las filas con id se insertan o actualizan por bloque con update_conflicts
+#y las filas sin id se insertan por bloque con un bulk_create normal. Antes de cada bloque sin id
+#se escriben los ids explicitos pendientes y se mueve la secuencia mas alla de ellos, asi un
+#producto nuevo nunca toma el id de otro. Un id explicito que cae en un producto creado antes
+#por la misma importacion se reporta como error en lugar de pisarlo
+def import_products(lines, chunk_size=IMPORT_CHUNK_SIZE):
+    start = time.perf_counter()
+    reader = csv.DictReader(lines)
+    serializer = CatalogRowSerializer()
+    imported = 0
+    errors = []
+    upserts = {}
+    inserts = []
+    created = []
+    reset_sequence = False
+
+    def check_skus(rows):
+        kept, skus = [], set()
+        for line, product in rows:
+            if product.sku is not None:
+                if product.sku in skus:
+                    errors.append({'line': line, 'errors': {'sku': ['This SKU is repeated in the file.']}})
+                    continue
+                skus.add(product.sku)
+            kept.append((line, product))
+        owners = dict(Product.objects.filter(sku__in=skus).values_list('sku', 'id')) if skus else {}
+        rows = []
+        for line, product in kept:
+            owner = owners.get(product.sku)
+            if owner is not None and owner != product.pk:
+                errors.append({'line': line, 'errors': {'sku': ['product with this sku already exists.']}})
+                continue
+            rows.append(product)
+        return rows
+
+    def flush_upserts():
+        nonlocal imported, reset_sequence
+        products = check_skus(upserts.values())
+        upserts.clear()
+        if not products:
+            return
+        #Sin columna sku en el archivo no se borran los sku existentes
+        update_fields = [name for name in UPDATE_FIELDS if name != 'sku' or 'sku' in reader.fieldnames]
+        with transaction.atomic():
+            Product.objects.bulk_create(products, batch_size=chunk_size, update_conflicts=True, unique_fields=['id'], update_fields=update_fields)
+            product_ids = [product.pk for product in products]
+            Product.objects.filter(pk__in=product_ids).update(version=F('version') + 1)
+            transaction.on_commit(lambda: invalidate_products(product_ids))
+            transaction.on_commit(bump_inventory_revision)
+        imported += len(products)
+        reset_sequence = True
+
+    def flush_inserts():
+        nonlocal imported, reset_sequence
+        if upserts:
+            flush_upserts()
+        if reset_sequence:
+            _reset_product_sequence()
+            reset_sequence = False
+        products = check_skus(inserts)
+        inserts.clear()
+        if not products:
+            return
+        with transaction.atomic():
+            products = Product.objects.bulk_create(products)
+            product_ids = [product.pk for product in products if product.pk]
+            transaction.on_commit(lambda: invalidate_products(product_ids))
+            transaction.on_commit(bump_inventory_revision)
+        _add_created(created, product_ids)
+        imported += len(products)
+
+    for row in reader:
+        if row.get('sku') == '':
+            row['sku'] = None
+        try:
+            data = serializer.run_validation(row)
+            pk = _parse_id(row.get('id'))
+        except ValidationError as exc:
+            errors.append({'line': reader.line_num, 'errors': as_serializer_error(exc)})
+            continue
+        if pk is None:
+            inserts.append((reader.line_num, Product(**data)))
+            if len(inserts) >= chunk_size:
+                flush_inserts()
+        elif any(first <= pk <= last for first, last in created):
+            errors.append({'line': reader.line_num, 'errors': {'id': ['This id belongs to a product created earlier in this import.']}})
+        else:
+            upserts[pk] = (reader.line_num, Product(pk=pk, **data))
+            if len(upserts) >= chunk_size:
+                flush_upserts()
+    if inserts:
+        flush_inserts()
+    if upserts:
+        flush_upserts()
+    if reset_sequence:
+        _reset_product_sequence()
+    #bulk_create no envia post_save: el indice de sku se invalida aqui
+    if imported:
+        transaction.on_commit(invalidate_index)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'imported': imported,
+        'errors': sorted(errors, key=lambda error: error['line']),
+        'seconds': elapsed,
+        'rows_per_second': (imported + len(errors)) / elapsed if elapsed else 0,
+    }
+
+#Ids creados por la importacion como rangos [primero, ultimo]: la secuencia los entrega casi
+#siempre consecutivos, asi la lista no crece con el numero de filas
+def _add_created(created, product_ids):
+    for pk in sorted(product_ids):
+        if created and created[-1][1] + 1 == pk:
+            created[-1][1] = pk
+        else:
+            created.append([pk, pk])
+
+def _parse_id(value):
+    if value in (None, ''):
+        return None
+    try:
+        pk = int(value)
+    except ValueError:
+        pk = 0
+    if pk < 1:
+        raise ValidationError({'id': ['A valid positive integer is required.']})
+    return pk
+
+#Los ids explicitos no avanzan la secuencia de PostgreSQL
+def _reset_product_sequence():
+    statements = connection.ops.sequence_reset_sql(no_style(), [Product])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+class _Echo:
+    def write(self, value):
+        return value
+
+#Exportacion del catalogo como generador de lineas CSV leidas con un cursor del servidor
+def export_products(chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CATALOG_FIELDS)
+    rows = Product.objects.order_by('id').values_list(*CATALOG_FIELDS)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow(row)
+
+#Busqueda por nombre para el selector de productos: primero los que empiezan por el texto y luego
+#los que lo contienen. En PostgreSQL el icontains usa el indice de trigramas de la migracion 0013
+def search_products(text, limit=SEARCH_LIMIT):
+    text = text.strip()
+    if not text:
+        return []
+    rank = Case(When(name__istartswith=text, then=Value(0)), default=Value(1), output_field=IntegerField())
+    rows = Product.objects.filter(name__icontains=text).annotate(rank=rank).order_by('rank', 'name', 'id')
+    return list(rows.values('id', 'name', 'stock')[:limit])
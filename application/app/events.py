@@ -0,0 +1,97 @@
+import asyncio
+import itertools
+import json
+import threading
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+
+SUBSCRIBER_QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+
+
+class _Subscriber:
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    #Se ejecuta en el loop del suscriptor; si el cliente no consume a tiempo se descartan sus
+    #eventos pendientes y se le pide recargar todo en lugar de acumular memoria
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+#Broker en proceso que reparte los eventos confirmados a los clientes SSE conectados a este
+#proceso ASGI. publish() puede llamarse desde cualquier hilo (las vistas sincronas corren en
+#hilos del executor)
+class EventBroker:
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def subscribe(self):
+        subscriber = _Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event, data):
+        message = f"id: {next(self._ids)}\nevent: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+            except RuntimeError:
+                self.unsubscribe(subscriber)
+
+    #La suscripcion se crea al empezar a consumir el stream y se libera en el finally, asi un
+    #cliente que se desconecta antes de empezar no deja un suscriptor sin liberar
+    async def stream(self, heartbeat=HEARTBEAT_SECONDS):
+        subscriber = self.subscribe()
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                if subscriber.overflowed:
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    subscriber.overflowed = False
+                    yield 'event: resync\ndata: {}\n\n'
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+broker = EventBroker()
+
+
+#Con WSGI, Django consume un stream asincrono entero con async_to_sync: la conexion ocuparia un
+#worker para siempre sin entregar ningun evento. Los eventos solo se sirven con ASGI
+def live_events_available(request):
+    return isinstance(request, ASGIRequest)
+
+
+#Eventos publicados despues del commit por el servicio de stock
+def publish_stock(rows):
+    if not broker.has_subscribers():
+        return
+    for row in rows:
+        broker.publish('stock', {'id': row['id'], 'name': row['name'], 'stock': row['stock']})
+        quantity_needed = row['min_stock'] - row['stock'] if row['stock'] < row['min_stock'] else None
+        broker.publish('low_stock', {'id': row['id'], 'name': row['name'], 'quantity_needed': quantity_needed})
@@ -1,4 +1,5 @@
 from django import forms
+from django.urls import reverse_lazy
 from .models import CustomUser, InventoryEntry, InventoryExit, Product
 
 class CustomUserCreationForm(forms.ModelForm):
@@ -53,15 +54,36 @@ class StockForm(forms.ModelForm):
         model = Product
         fields = ['stock']
 
+#Selector de producto que solo incluye la opcion elegida; las demas se cargan desde
+#/api/products/search/ mientras se escribe (static/app/product_search.js). Al validar,
+#ModelChoiceField busca solo el producto enviado
+class ProductSearchWidget(forms.Select):
+    class Media:
+        js = ['app/product_search.js']
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.attrs.setdefault('data-product-search', reverse_lazy('product-search'))
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [item for item in value if item not in (None, '')]
+        products = Product.objects.filter(pk__in=selected).only('name') if all(str(item).isdigit() for item in selected) else []
+        return [
+            (None, [self.create_option(name, product.pk, str(product), True, index)], index)
+            for index, product in enumerate(products)
+        ]
+
 class InventoryEntryForm(forms.ModelForm):
     class Meta:
         model = InventoryEntry
         fields = ['product', 'quantity_received']
+        widgets = {'product': ProductSearchWidget}
 
 class InventoryExitForm(forms.ModelForm):
     class Meta:
         model = InventoryExit
         fields = ['product', 'quantity_sold']
+        widgets = {'product': ProductSearchWidget}
 
     def clean(self):
         cleaned_data = super().clean()
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+#PBKDF2 con el numero de iteraciones de PASSWORD_HASH_ITERATIONS. Conserva el nombre del
+#algoritmo, asi que verifica los hashes existentes y, si sus iteraciones no coinciden,
+#must_update hace que el login vuelva a calcular el hash con el costo configurado
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
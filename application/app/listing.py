@@ -0,0 +1,110 @@
+import json
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from .models import CustomUser, Product, Role
+
+#Orden: etiqueta y columnas; el id desempata para que las paginas no se solapen
+PRODUCT_SORTS = {
+    'name': ('Nombre (A-Z)', ('name', 'id')),
+    '-name': ('Nombre (Z-A)', ('-name', '-id')),
+    'price': ('Precio (menor primero)', ('price', 'id')),
+    '-price': ('Precio (mayor primero)', ('-price', '-id')),
+    '-id': ('Mas recientes', ('-id',)),
+}
+USER_SORTS = {
+    'username': ('Usuario (A-Z)', ('username',)),
+    '-username': ('Usuario (Z-A)', ('-username',)),
+    'email': ('Correo (A-Z)', ('email',)),
+    '-email': ('Correo (Z-A)', ('-email',)),
+    '-id': ('Mas recientes', ('-id',)),
+}
+PAGE_SIZES = (25, 50, 100, 200)
+
+
+#Paginacion de las paginas de administracion: filtros y orden solo sobre columnas con indice y
+#paginas de tamaño acotado, asi el renderizado no crece con el catalogo ni con los usuarios
+class EstimatedCountPaginator(Paginator):
+    #En PostgreSQL el total se toma de la estimacion del planificador (EXPLAIN) cuando supera
+    #LISTING_ESTIMATE_COUNT_THRESHOLD; por debajo, o en otras bases, se cuenta con COUNT(*)
+    estimated = False
+
+    @cached_property
+    def count(self):
+        threshold = getattr(settings, 'LISTING_ESTIMATE_COUNT_THRESHOLD', None)
+        connection = connections[self.object_list.db]
+        if threshold is not None and connection.vendor == 'postgresql':
+            sql, params = self.object_list.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+            if estimate >= threshold:
+                self.estimated = True
+                return estimate
+        return self.object_list.count()
+
+def _choice(params, name, choices, default):
+    value = params.get(name)
+    return value if value in choices else default
+
+def _page_size(params):
+    try:
+        page_size = int(params.get('page_size'))
+    except (TypeError, ValueError):
+        return getattr(settings, 'LISTING_PAGE_SIZE', 50)
+    return page_size if page_size in PAGE_SIZES else getattr(settings, 'LISTING_PAGE_SIZE', 50)
+
+def paginate(request, queryset, page_size):
+    page = EstimatedCountPaginator(queryset, page_size).get_page(request.GET.get('page'))
+    #Parametros de la consulta sin la pagina, para los enlaces de navegacion
+    query = request.GET.copy()
+    query.pop('page', None)
+    return page, query.urlencode()
+
+#Filtros: nombre (contiene; en PostgreSQL usa el indice trigram de UPPER(name)) y stock bajo
+#el minimo (indice parcial app_product_low_stock_idx)
+def product_listing(request):
+    params = request.GET
+    sort = _choice(params, 'sort', PRODUCT_SORTS, 'name')
+    products = Product.objects.only('id', 'name', 'description', 'stock', 'min_stock', 'price')
+    q = params.get('q', '').strip()
+    if q:
+        products = products.filter(name__icontains=q)
+    low_stock = params.get('low_stock') == '1'
+    if low_stock:
+        products = products.filter(stock__lt=F('min_stock'))
+    page, query = paginate(request, products.order_by(*PRODUCT_SORTS[sort][1]), _page_size(params))
+    return {
+        'page': page,
+        'query': query,
+        'filters': {'q': q, 'low_stock': low_stock, 'sort': sort, 'page_size': page.paginator.per_page},
+        'sorts': [(key, label) for key, (label, _) in PRODUCT_SORTS.items()],
+        'page_sizes': PAGE_SIZES,
+    }
+
+#Filtros: usuario o correo (contiene) y rol (indice app_user_role_username_idx)
+def user_listing(request):
+    params = request.GET
+    sort = _choice(params, 'sort', USER_SORTS, 'username')
+    users = CustomUser.objects.only('id', 'username', 'email', 'role')
+    q = params.get('q', '').strip()
+    if q:
+        users = users.filter(Q(username__icontains=q) | Q(email__icontains=q))
+    roles = list(Role.objects.order_by('id').values_list('id', 'name'))
+    role = _choice(params, 'role', {str(role_id) for role_id, _ in roles}, '')
+    if role:
+        users = users.filter(role_id=role)
+    page, query = paginate(request, users.order_by(*USER_SORTS[sort][1]), _page_size(params))
+    return {
+        'page': page,
+        'query': query,
+        'filters': {'q': q, 'role': role, 'sort': sort, 'page_size': page.paginator.per_page},
+        'sorts': [(key, label) for key, (label, _) in USER_SORTS.items()],
+        'page_sizes': PAGE_SIZES,
+        'roles': roles,
+    }
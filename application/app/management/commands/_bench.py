@@ -0,0 +1,213 @@
+import asyncio
+import datetime
+import random
+import re
+import time
+import uuid
+from decimal import Decimal
+from urllib.parse import urlsplit
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+from app.models import CustomUser, InventoryEntry, InventoryExit, Product, Role, Ticket
+
+
+#Utilidades compartidas por los comandos de benchmark
+def seed_products(count, batch_size=5000):
+    #Prefijo por ejecucion para que el sku siga siendo unico al sembrar varias veces
+    run = uuid.uuid4().hex[:8]
+    batch = []
+    for i in range(count):
+        batch.append(Product(
+            name=f'Producto {i}',
+            sku=f'{run}-{i}',
+            description='Producto generado para benchmark',
+            stock=random.randint(0, 500),
+            min_stock=random.randint(0, 50),
+            price=Decimal(random.randint(100, 100000)) / 100,
+        ))
+        if len(batch) >= batch_size:
+            Product.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_create(batch)
+    return list(Product.objects.order_by('id').values_list('id', flat=True))
+
+def seed_exits(count, product_ids, batch_size=10000):
+    batch = []
+    for _ in range(count):
+        batch.append(InventoryExit(product_id=random.choice(product_ids), quantity_sold=random.randint(1, 10)))
+        if len(batch) >= batch_size:
+            InventoryExit.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        InventoryExit.objects.bulk_create(batch)
+
+#Movimientos (entradas o salidas) repartidos en los ultimos `days` dias. La fecha es auto_now_add,
+#asi que en la ruta generica se inserta y luego se corrige la fecha por bloques de ids; en PostgreSQL
+#se genera todo en el servidor con generate_series, que es lo unico viable para decenas de millones de filas
+def seed_dated_movements(model, quantity_field, date_field, count, product_ids, days, batch_size=10000):
+    today = timezone.localdate()
+    if connection.vendor == 'postgresql':
+        qn = connection.ops.quote_name
+        opts = model._meta
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {qn(opts.db_table)} ({qn(opts.get_field('product').column)}, "
+                f"{qn(opts.get_field(quantity_field).column)}, {qn(opts.get_field(date_field).column)}) "
+                f"SELECT (%s::bigint[])[1 + floor(random() * %s)::int], 1 + floor(random() * 10)::int, "
+                f"%s::date - floor(random() * %s)::int FROM generate_series(1, %s)",
+                [list(product_ids), len(product_ids), today, days, count],
+            )
+        return
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        created = model.objects.bulk_create([
+            model(product_id=random.choice(product_ids), **{quantity_field: random.randint(1, 10)})
+            for _ in range(size)
+        ])
+        ids = [movement.pk for movement in created]
+        day_size = max(1, size // days)
+        for offset in range(0, size, day_size):
+            model.objects.filter(id__in=ids[offset:offset + day_size]).update(
+                **{date_field: today - datetime.timedelta(days=random.randrange(days))}
+            )
+
+def seed_dated_exits(count, product_ids, days, batch_size=10000):
+    seed_dated_movements(InventoryExit, 'quantity_sold', 'date_sold', count, product_ids, days, batch_size)
+
+def seed_dated_entries(count, product_ids, days, batch_size=10000):
+    seed_dated_movements(InventoryEntry, 'quantity_received', 'date_received', count, product_ids, days, batch_size)
+
+#Todos los usuarios comparten un hash calculado una sola vez: el costo del hash no cuenta en la siembra
+def seed_users(count, password, batch_size=5000):
+    password_hash = make_password(password)
+    role = Role.default_role()
+    suffix = uuid.uuid4().hex[:8]
+    for start in range(0, count, batch_size):
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f'user{i}-{suffix}@example.com', username=f'user{i}-{suffix}', password=password_hash, role=role)
+            for i in range(start, min(count, start + batch_size))
+        ])
+
+def seed_tickets(count, batch_size=5000):
+    types = [choice for choice, _ in Ticket.TYPE_CHOICES]
+    words = ['cuenta', 'inventario', 'error', 'pagina', 'producto', 'venta', 'stock', 'correo', 'reporte', 'acceso']
+    for start in range(0, count, batch_size):
+        Ticket.objects.bulk_create([
+            Ticket(
+                status=random.choice(['Pendiente', 'En proceso', 'Cerrado']),
+                type=random.choice(types),
+                description=' '.join(random.choices(words, k=8)),
+            )
+            for _ in range(min(batch_size, count - start))
+        ])
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+def latency_summary(latencies, elapsed):
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'requests_per_second': len(values) / elapsed if elapsed else 0,
+        'p50_ms': percentile(values, 50) * 1000 if values else None,
+        'p95_ms': percentile(values, 95) * 1000 if values else None,
+        'p99_ms': percentile(values, 99) * 1000 if values else None,
+    }
+
+#Cliente HTTP/1.1 minimo con conexiones persistentes para las pruebas de carga
+async def _http_request(reader, writer, host, method, path, headers, body=b''):
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {host}', f'Content-Length: {len(body)}']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    if 'content-length' in response_headers:
+        await reader.readexactly(int(response_headers['content-length']))
+    elif response_headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    keep_alive = response_headers.get('connection', '').lower() != 'close'
+    return status, keep_alive, response_headers
+
+#Consultas por peticion que informa RequestMetricsMiddleware en la cabecera Server-Timing
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+#Con `rate` las peticiones salen a ritmo fijo (lazo abierto, como un ataque) en lugar de
+#encadenarse en cuanto llega la respuesta anterior
+async def http_load(base_url, requests, total, concurrency, headers=None, rate=None):
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    headers = headers or {}
+    latencies = {name: [] for name, _, _, _ in requests}
+    statuses = {name: {} for name, _, _, _ in requests}
+    queries = {name: [] for name, _, _, _ in requests}
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        connection = None
+        for index in counter:
+            name, method, path, body = requests[index % len(requests)]
+            if rate:
+                delay = start + index / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection(host, port)
+                sent = time.perf_counter()
+                status, keep_alive, response_headers = await _http_request(*connection, url.netloc, method, path, headers, body)
+                latencies[name].append(time.perf_counter() - sent)
+                statuses[name][status] = statuses[name].get(status, 0) + 1
+                match = SERVER_TIMING_QUERIES.search(response_headers.get('server-timing', ''))
+                if match:
+                    queries[name].append(int(match.group(1)))
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                errors += 1
+                keep_alive = False
+            if not keep_alive and connection is not None:
+                connection[1].close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {
+        'seconds': elapsed,
+        'errors': errors,
+        'requests_per_second': sum(len(values) for values in latencies.values()) / elapsed,
+        'endpoints': {
+            name: {
+                **latency_summary(values, elapsed),
+                'statuses': statuses[name],
+                'queries_per_request': sum(queries[name]) / len(queries[name]) if queries[name] else None,
+            }
+            for name, values in latencies.items()
+        },
+    }
@@ -0,0 +1,46 @@
+import json
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+from app.models import CustomUser
+from app.views import InventoryEntryBulkCreateAPIView, InventoryExitBulkCreateAPIView
+from ._bench import seed_products
+
+
+class Command(BaseCommand):
+    help = 'Mide la ingesta masiva de movimientos de inventario (JSON o NDJSON) de extremo a extremo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--kind', choices=['entries', 'exits'], default='exits')
+        parser.add_argument('--format', choices=['json', 'ndjson'], default='json')
+
+    def handle(self, *args, **options):
+        quantity_field = 'quantity_received' if options['kind'] == 'entries' else 'quantity_sold'
+        view = (InventoryEntryBulkCreateAPIView if options['kind'] == 'entries' else InventoryExitBulkCreateAPIView).as_view()
+        factory = APIRequestFactory()
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(email='bench@example.com', username='bench', password='bench')
+            product_ids = seed_products(options['products'])
+            rows = [{'product': random.choice(product_ids), quantity_field: random.randint(1, 5)} for _ in range(options['rows'])]
+            if options['format'] == 'ndjson':
+                body = '\n'.join(json.dumps(row) for row in rows)
+                request = factory.post('/', body, content_type='application/x-ndjson')
+            else:
+                request = factory.post('/', json.dumps(rows), content_type='application/json')
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            response = view(request)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps({
+            'rows': options['rows'],
+            'format': options['format'],
+            'status': response.status_code,
+            'created': response.data['created'],
+            'seconds': elapsed,
+            'rows_per_second': options['rows'] / elapsed,
+        }))
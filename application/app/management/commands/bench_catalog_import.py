@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app.catalog import CATALOG_FIELDS, IMPORT_CHUNK_SIZE, export_products, import_products
+
+
+class Command(BaseCommand):
+    help = 'Mide la importacion (alta y actualizacion) y la exportacion en streaming del catalogo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CATALOG_FIELDS)
+        for i in range(rows):
+            writer.writerow(['', f'Producto {i}', 'Producto generado para benchmark', random.randint(0, 500), random.randint(0, 50), f'{random.randint(100, 100000) / 100:.2f}'])
+        buffer.seek(0)
+
+        with transaction.atomic():
+            created = import_products(buffer, chunk_size=options['chunk_size'])
+
+            start = time.perf_counter()
+            exported = io.StringIO()
+            exported.writelines(export_products())
+            export_seconds = time.perf_counter() - start
+
+            #Reimporta la exportacion: todas las filas llevan id y se actualizan
+            exported.seek(0)
+            updated = import_products(exported, chunk_size=options['chunk_size'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps({
+            'rows': rows,
+            'insert_rows_per_second': created['rows_per_second'],
+            'upsert_rows_per_second': updated['rows_per_second'],
+            'export_rows_per_second': rows / export_seconds,
+            'errors': len(created['errors']) + len(updated['errors']),
+        }))
@@ -0,0 +1,60 @@
+import datetime
+import json
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from app import renderers
+from app.models import Product
+from app.renderers import FastJSONRenderer, FastJsonResponse
+from app.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = ('Serializacion JSON de respuestas grandes: JsonResponse frente a FastJsonResponse con filas '
+            'de values() (Decimal y fechas sin convertir) y JSONRenderer frente a FastJSONRenderer con la '
+            'salida de ProductSerializer. No usa la base de datos; reporta bytes por segundo.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--rounds', type=int, default=5, help='Se toma la mejor ronda de cada caso.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        rows = [{
+            'id': i,
+            'product__name': f'Producto {i}',
+            'quantity_sold': random.randint(1, 10),
+            'price': Decimal(random.randint(100, 100000)) / 100,
+            'date_sold': now - datetime.timedelta(seconds=random.randint(0, 86400 * 365)),
+        } for i in range(options['rows'])]
+        products = [Product(
+            id=i, name=f'Producto {i}', description='Producto generado para benchmark', sku=f'sku-{i}',
+            stock=random.randint(0, 500), min_stock=random.randint(0, 50), price=Decimal(random.randint(100, 100000)) / 100,
+        ) for i in range(options['rows'])]
+        serialized = ProductSerializer(products, many=True).data
+
+        cases = {
+            'json_response': lambda: JsonResponse({'rows': rows}).content,
+            'fast_json_response': lambda: FastJsonResponse({'rows': rows}).content,
+            'drf_json_renderer': lambda: JSONRenderer().render(serialized),
+            'fast_json_renderer': lambda: FastJSONRenderer().render(serialized),
+        }
+        results = {}
+        for name, render in cases.items():
+            best = None
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                size = len(render())
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = {'seconds': best, 'bytes': size, 'megabytes_per_second': size / best / 1e6}
+        result = {'rows': options['rows'], 'orjson': renderers.orjson is not None, 'cases': results}
+        result['speedup'] = {
+            'json_response': results['json_response']['seconds'] / results['fast_json_response']['seconds'],
+            'drf': results['drf_json_renderer']['seconds'] / results['fast_json_renderer']['seconds'],
+        }
+        self.stdout.write(json.dumps(result))
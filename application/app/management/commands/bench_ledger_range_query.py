@@ -0,0 +1,63 @@
+import datetime
+import json
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from app.models import InventoryExit, Product
+from ._bench import latency_summary, seed_dated_exits, seed_products
+
+
+def _range_queries(product_ids, days):
+    today = timezone.localdate()
+    product_id = random.choice(product_ids)
+    month_end = today - datetime.timedelta(days=random.randrange(days))
+    month_start = month_end - datetime.timedelta(days=30)
+    week_start = today - datetime.timedelta(days=7)
+    return {
+        'product_month_total': lambda: InventoryExit.objects.filter(product_id=product_id, date_sold__range=(month_start, month_end)).aggregate(total=Sum('quantity_sold')),
+        'month_total': lambda: InventoryExit.objects.filter(date_sold__range=(month_start, month_end)).aggregate(total=Sum('quantity_sold')),
+        'product_last_week': lambda: list(InventoryExit.objects.filter(product_id=product_id, date_sold__gte=week_start).values('quantity_sold', 'date_sold')),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Latencia de consultas por rango de fechas sobre las salidas. Para medir a escala (p. ej. 50M filas) '
+            'en PostgreSQL: sembrar con --rows 50000000 --keep, medir con --no-seed antes y despues de '
+            'ejecutar partition_ledger.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=730, help='Dias de historial sobre los que se reparten las salidas.')
+        parser.add_argument('--queries', type=int, default=200, help='Consultas medidas de cada tipo.')
+        parser.add_argument('--no-seed', action='store_true', help='Mide los datos existentes sin sembrar.')
+        parser.add_argument('--keep', action='store_true', help='Confirma los datos sembrados en lugar de revertirlos.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['no_seed']:
+                product_ids = list(Product.objects.values_list('id', flat=True))
+            else:
+                product_ids = seed_products(options['products'])
+                seed_dated_exits(options['rows'], product_ids, options['days'])
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(InventoryExit._meta.db_table)}")
+            latencies = {}
+            for _ in range(options['queries']):
+                for name, query in _range_queries(product_ids, options['days']).items():
+                    start = time.perf_counter()
+                    query()
+                    latencies.setdefault(name, []).append(time.perf_counter() - start)
+            result = {
+                'vendor': connection.vendor,
+                'rows': InventoryExit.objects.count(),
+                'queries': {name: latency_summary(values, sum(values)) for name, values in latencies.items()},
+                'plan': InventoryExit.objects.filter(date_sold__gte=timezone.localdate() - datetime.timedelta(days=30)).explain(),
+            }
+            if not options['keep']:
+                transaction.set_rollback(True)
+        self.stdout.write(json.dumps(result, default=str))
@@ -0,0 +1,46 @@
+import json
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from app.models import CustomUser
+
+METRICS_MIDDLEWARE = 'app.metrics.RequestMetricsMiddleware'
+
+
+class Command(BaseCommand):
+    help = ('Sobrecarga de RequestMetricsMiddleware: peticiones por segundo de una vista con y sin el '
+            'middleware, alternando rondas para repartir el ruido. Crea y borra un usuario temporal.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Peticiones por ronda.')
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--path', default='/tickets/')
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        user = CustomUser.objects.create_user(email=f'bench-{suffix}@example.com', username=f'bench-{suffix}', password=uuid.uuid4().hex)
+        without = [name for name in settings.MIDDLEWARE if name != METRICS_MIDDLEWARE]
+        clients = {}
+        for label, middleware in [('without_metrics', without), ('with_metrics', [METRICS_MIDDLEWARE, *without])]:
+            with override_settings(MIDDLEWARE=middleware):
+                clients[label] = Client(HTTP_HOST='localhost')
+                clients[label].force_login(user)
+                clients[label].get(options['path'])
+        elapsed = {label: 0.0 for label in clients}
+        try:
+            for _ in range(options['rounds']):
+                for label, client in clients.items():
+                    start = time.perf_counter()
+                    for _ in range(options['requests']):
+                        client.get(options['path'])
+                    elapsed[label] += time.perf_counter() - start
+        finally:
+            user.delete()
+        total = options['requests'] * options['rounds']
+        result = {'path': options['path'], 'requests': total}
+        for label, seconds in elapsed.items():
+            result[label] = {'requests_per_second': total / seconds}
+        result['overhead_percent'] = (elapsed['with_metrics'] / elapsed['without_metrics'] - 1) * 100
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,44 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app.models import InventoryExit, Product
+from app.sales import aggregate_product_sales, product_sales, rebuild_sales_summary
+from ._bench import seed_exits, seed_products, timed
+
+
+def legacy_product_sales():
+    exits = list(InventoryExit.objects.all().values('product__name', 'quantity_sold'))
+    result = []
+    for product in Product.objects.all():
+        total = 0
+        for row in exits:
+            if product.name == row['product__name']:
+                total += row['quantity_sold']
+        result.append({'product_name': product.name, 'profit': total * product.price, 'quantity_sold': total, 'price': product.price})
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Compara el calculo de ventas por producto: resumen materializado, consulta agrupada y ciclo anidado en Python.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--exits', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--legacy', action='store_true', help='Mide tambien la implementacion anterior (O(productos x salidas)).')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            product_ids = seed_products(options['products'])
+            seed_exits(options['exits'], product_ids)
+            result = {
+                'products': options['products'],
+                'exits': options['exits'],
+                'grouped_query_seconds': timed(aggregate_product_sales, options['repeat']),
+            }
+            rebuild_sales_summary(product_ids[0], product_ids[-1] + 1)
+            result['summary_read_seconds'] = timed(product_sales, options['repeat'])
+            if options['legacy']:
+                result['legacy_loop_seconds'] = timed(legacy_product_sales, options['repeat'])
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from app.models import InventoryExit, Product
+
+
+def legacy_exit(product_id, quantity):
+    product = Product.objects.get(pk=product_id)
+    product.stock -= quantity
+    product.save()
+
+
+class Command(BaseCommand):
+    help = ('Lanza escritores concurrentes que registran ventas del mismo producto y cuenta las '
+            'actualizaciones de stock perdidas. Cada escritor usa su propia conexion: ajusta '
+            'max_connections de PostgreSQL al numero de escritores.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=500)
+        parser.add_argument('--sales', type=int, default=1, help='Ventas registradas por escritor.')
+        parser.add_argument('--legacy', action='store_true', help='Usa el leer-modificar-guardar anterior sobre Product.')
+
+    def handle(self, *args, **options):
+        writers = options['writers']
+        sales = options['sales']
+        initial = writers * sales
+        product = Product.objects.create(name='Benchmark concurrencia', description='', stock=initial, min_stock=0, price=1)
+        barrier = threading.Barrier(writers)
+        errors = []
+
+        def writer():
+            try:
+                barrier.wait()
+                for _ in range(sales):
+                    if options['legacy']:
+                        legacy_exit(product.pk, 1)
+                    else:
+                        InventoryExit.objects.create(product_id=product.pk, quantity_sold=1)
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        product.refresh_from_db()
+        applied = writers * sales - len(errors) * sales
+        result = {
+            'writers': writers,
+            'sales_per_writer': sales,
+            'mode': 'legacy' if options['legacy'] else 'atomic',
+            'seconds': elapsed,
+            'errors': len(errors),
+            'expected_stock': initial - applied,
+            'final_stock': product.stock,
+            'lost_updates': product.stock - (initial - applied),
+        }
+        product.delete()
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,40 @@
+import json
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from app import user_cache
+from app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ('Peticiones por segundo de una vista con sesion, cargando el usuario de la base en cada '
+            'peticion (USER_CACHE_TIMEOUT=0) y desde la cache de usuarios. Crea y borra un usuario temporal.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--path', default='/dashboard/')
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        user = CustomUser.objects.create_user(email=f'bench-{suffix}@example.com', username=f'bench-{suffix}', password=uuid.uuid4().hex)
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        result = {'path': options['path'], 'requests': options['requests']}
+        try:
+            for label, timeout in [('database', 0), ('cached', 300)]:
+                with override_settings(USER_CACHE_TIMEOUT=timeout):
+                    user_cache.invalidate_user(user.pk)
+                    client.get(options['path'])
+                    queries = []
+                    with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                        client.get(options['path'])
+                    start = time.perf_counter()
+                    for _ in range(options['requests']):
+                        client.get(options['path'])
+                    elapsed = time.perf_counter() - start
+                result[label] = {'requests_per_second': options['requests'] / elapsed, 'queries_per_request': len(queries)}
+        finally:
+            user.delete()
+        self.stdout.write(json.dumps(result))
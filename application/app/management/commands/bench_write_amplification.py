@@ -0,0 +1,40 @@
+import json
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from app.models import InventoryExit, Product
+
+
+def _count_statements(func, repeat):
+    statements = Counter()
+
+    def count(execute, sql, *args):
+        statements[sql.lstrip().split(None, 1)[0].upper()] += 1
+        return execute(sql, *args)
+
+    with connection.execute_wrapper(count):
+        for _ in range(repeat):
+            func()
+    return {kind: total / repeat for kind, total in sorted(statements.items())}
+
+
+class Command(BaseCommand):
+    help = ('Sentencias SQL por venta (INSERT/UPDATE/DELETE/SELECT) con stock suficiente y con stock bajo '
+            'el minimo, y por guardado de un producto. Los datos se crean en una transaccion que se revierte.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sales', type=int, default=200)
+
+    def handle(self, *args, **options):
+        sales = options['sales']
+        with transaction.atomic():
+            in_stock = Product.objects.create(name='Benchmark', description='Producto de benchmark', stock=sales * 10, min_stock=0, price='1.00')
+            low_stock = Product.objects.create(name='Benchmark bajo', description='Producto de benchmark', stock=0, min_stock=sales * 10, price='1.00')
+            result = {
+                'vendor': connection.vendor,
+                'sale_in_stock': _count_statements(lambda: InventoryExit.objects.create(product=in_stock, quantity_sold=1), sales),
+                'sale_low_stock': _count_statements(lambda: InventoryExit.objects.create(product=low_stock, quantity_sold=1), sales),
+                'product_save': _count_statements(lambda: low_stock.save(), sales),
+            }
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,243 @@
+import asyncio
+import datetime
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, get_resolver
+from django.utils import timezone
+from app.authentication import InventoryRefreshToken
+from app.models import CustomUser, InventoryEntry, InventoryExit, Product, Ticket
+from ._bench import http_load
+from .seed_benchmark_data import BENCH_EMAIL
+
+#Rutas de application/urls.py que no se miden y por que
+SKIPPED = {
+    'admin/': 'Admin de Django',
+    'inventory_events/': 'Conexion SSE de larga duracion',
+    'api/logout/': 'Revoca el token JWT del benchmark',
+}
+
+
+#Catalogo de peticiones por ruta de application/urls.py: (nombre, ruta, metodo, url, cuerpo, tipo).
+#Las rutas de escritura solo se miden con --writes; sus cuerpos usan los ids sembrados
+def _read_endpoints(ids, password):
+    today = timezone.localdate()
+    month_ago = today - datetime.timedelta(days=30)
+    login = json.dumps({'email': BENCH_EMAIL, 'password': password}).encode()
+    return [
+        ('home', '', 'GET', '/', None, None),
+        ('loginview', 'login/', 'GET', '/login/', None, None),
+        ('register', 'register/', 'GET', '/register/', None, None),
+        ('dashboard', 'dashboard/', 'GET', '/dashboard/', None, None),
+        ('profile', 'profile/', 'GET', '/profile/', None, None),
+        ('user_administration', 'user-administration/', 'GET', '/user-administration/', None, None),
+        ('control_products', 'control_products/', 'GET', '/control_products/', None, None),
+        ('edit_product', 'edit_product/<int:product_id>/', 'GET', f"/edit_product/{ids['product']}/", None, None),
+        ('get_product_stock', 'get_product_stock/<int:product_id>/', 'GET', f"/get_product_stock/{ids['product']}/", None, None),
+        ('register_inventory_entry', 'new_inventory/', 'GET', '/new_inventory/', None, None),
+        ('register_inventory_exit', 'sales/', 'GET', '/sales/', None, None),
+        ('inventory_information', 'inventory_information/', 'GET', '/inventory_information/', None, None),
+        ('inventory_information_dashboard', 'inventory_information_dashboard/', 'GET', '/inventory_information_dashboard/', None, None),
+        ('inventory_consult', 'inventory_consult/', 'GET', '/inventory_consult/', None, None),
+        ('inventory_consult_data', 'inventory_consult_data/', 'GET', '/inventory_consult_data/', None, None),
+        ('get_tickets', 'tickets/', 'GET', '/tickets/', None, None),
+        ('get_ticket_details', 'tickets/<int:ticket_id>/', 'GET', f"/tickets/{ids['ticket']}/", None, None),
+        ('metrics', 'metrics', 'GET', '/metrics', None, None),
+        ('login', 'api/login/', 'POST', '/api/login/', login, 'application/json'),
+        ('profile_detail', 'api/profile/', 'GET', '/api/profile/', None, None),
+        ('user-list', 'api/users/', 'GET', '/api/users/', None, None),
+        ('product-export', 'api/products/export/', 'GET', '/api/products/export/', None, None),
+        ('product-search', 'api/products/search/', 'GET', '/api/products/search/?q=Producto%201', None, None),
+        ('product-detail', 'api/products/<int:pk>/', 'GET', f"/api/products/{ids['product']}/", None, None),
+        ('product-stock', 'api/products/<int:pk>/stock/', 'GET', f"/api/products/{ids['product']}/stock/", None, None),
+        ('product-stock-batch', 'api/products/stock/', 'GET', f"/api/products/stock/?ids={','.join(map(str, ids['basket']))}", None, None),
+        ('product-stock-batch-post', 'api/products/stock/', 'POST', '/api/products/stock/', {'ids': ids['basket']}, 'application/json'),
+        ('inventory-entry-list', 'api/inventory/entries/', 'GET', '/api/inventory/entries/', None, None),
+        ('inventory-exit-list', 'api/inventory/exits/', 'GET', '/api/inventory/exits/', None, None),
+        ('insufficient-stock-list', 'api/inventory/insufficient/', 'GET', '/api/inventory/insufficient/', None, None),
+        ('cache-stats', 'api/cache/stats/', 'GET', '/api/cache/stats/', None, None),
+        ('report-sales', 'api/reports/sales/', 'GET', f'/api/reports/sales/?from={month_ago}&to={today}', None, None),
+        ('report-movements', 'api/reports/movements/', 'GET', f'/api/reports/movements/?from={month_ago}&to={today}&granularity=week', None, None),
+    ]
+
+def _write_endpoints(ids):
+    product = ids['product']
+    rows = [{'product': product, 'quantity_received': 1} for _ in range(100)]
+    product_body = {'name': 'Producto benchmark', 'description': 'Actualizado por benchmark', 'stock': 1000, 'min_stock': 10, 'price': '9.99'}
+    return [
+        ('api-register', 'api/register/', 'POST', '/api/register/', None, 'application/json'),
+        ('profile_edit', 'api/profile/edit/', 'PUT', '/api/profile/edit/', {'first_name': 'Bench'}, 'application/json'),
+        ('user-edit', 'api/users/<int:pk>/', 'PUT', f"/api/users/{ids['user']}/", {'first_name': 'Bench'}, 'application/json'),
+        ('user-change-role', 'api/users/<int:pk>/change-role/', 'PUT', f"/api/users/{ids['user']}/change-role/", {'role_id': 2}, 'application/json'),
+        ('product-create', 'api/products/create/', 'POST', '/api/products/create/', product_body, 'application/json'),
+        ('product-update', 'api/products/<int:pk>/', 'PUT', f'/api/products/{product}/', product_body, 'application/json'),
+        ('product-import', 'api/products/import/', 'POST', '/api/products/import/',
+         f'id,name,description,stock,min_stock,price\n{product},Producto benchmark,Importado,1000,10,9.99\n', 'text/csv'),
+        ('inventory-entry-create', 'api/inventory/entry/create/', 'POST', '/api/inventory/entry/create/', {'product': product, 'quantity_received': 1}, 'application/json'),
+        ('inventory-exit-create', 'api/inventory/exit/create/', 'POST', '/api/inventory/exit/create/', {'product': product, 'quantity_sold': 1}, 'application/json'),
+        ('inventory-entry-bulk', 'api/inventory/entries/bulk/', 'POST', '/api/inventory/entries/bulk/', rows, 'application/json'),
+        ('inventory-exit-bulk', 'api/inventory/exits/bulk/', 'POST', '/api/inventory/exits/bulk/',
+         [{'product': product, 'quantity_sold': 1} for _ in range(100)], 'application/json'),
+        ('scan', 'api/scan/', 'POST', '/api/scan/', {'code': ids['sku'], 'action': 'sale'}, 'application/json'),
+    ]
+
+def _encode(body):
+    if body is None:
+        return b''
+    if isinstance(body, bytes):
+        return body
+    if isinstance(body, str):
+        return body.encode()
+    return json.dumps(body).encode()
+
+def _routes(patterns, prefix=''):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLPattern):
+            yield route
+        elif route not in SKIPPED:
+            yield from _routes(pattern.url_patterns, route)
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('El servidor termino antes de aceptar conexiones.')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError('El servidor no acepto conexiones a tiempo.')
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=settings.BASE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Mide cada ruta de application/urls.py con clientes concurrentes contra un servidor sobre la '
+            'base configurada (PostgreSQL o SQLite) y escribe JSON con peticiones por segundo, p50/p95/p99 y '
+            'consultas por peticion (cabecera Server-Timing de RequestMetricsMiddleware; en las rutas sin sesion de '
+            'administrador requiere REQUEST_METRICS_SERVER_TIMING=1 en el servidor). Requiere los '
+            'datos de seed_benchmark_data. Con --serve inicia su propio runserver; si no, usa --url.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--serve', action='store_true', help='Inicia manage.py runserver en un puerto libre.')
+        parser.add_argument('--requests', type=int, default=500, help='Peticiones medidas por ruta.')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--warmup', type=int, default=20, help='Peticiones previas sin medir por ruta.')
+        parser.add_argument('--password', default='bench-password', help=f'Contraseña de {BENCH_EMAIL}.')
+        parser.add_argument('--only', nargs='*', help='Nombres de ruta a medir.')
+        parser.add_argument('--writes', action='store_true', help='Mide tambien las rutas que escriben (modifican los datos).')
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', help='Archivo donde guardar el JSON ademas de la salida estandar.')
+
+    def handle(self, *args, **options):
+        admin = CustomUser.objects.filter(email=BENCH_EMAIL).first()
+        product = Product.objects.order_by('id').values_list('id', flat=True).first()
+        ticket = Ticket.objects.order_by('id').values_list('id', flat=True).first()
+        user = CustomUser.objects.exclude(email=BENCH_EMAIL).order_by('id').values_list('id', flat=True).first()
+        if admin is None or None in (product, ticket, user):
+            raise CommandError('Faltan datos: ejecutar antes seed_benchmark_data.')
+        sku = Product.objects.exclude(sku=None).order_by('id').values_list('sku', flat=True).first()
+        #Cesta de 50 productos para la lectura de stock por lote
+        basket = list(Product.objects.order_by('id').values_list('id', flat=True)[:50])
+        ids = {'product': product, 'ticket': ticket, 'user': user, 'sku': sku, 'basket': basket}
+        client = Client()
+        client.force_login(admin)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        endpoints = _read_endpoints(ids, options['password'])
+        if options['writes']:
+            if sku is None:
+                raise CommandError('Ningun producto tiene sku: ejecutar antes seed_benchmark_data.')
+            endpoints += _write_endpoints(ids)
+        if options['only']:
+            endpoints = [endpoint for endpoint in endpoints if endpoint[0] in options['only']]
+        measured_routes = {endpoint[1] for endpoint in endpoints}
+
+        server = None
+        url = options['url']
+        if options['serve']:
+            port = _free_port()
+            server = subprocess.Popen(
+                [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'runserver', '--noreload', f'127.0.0.1:{port}'],
+                env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE, 'REQUEST_METRICS_SERVER_TIMING': '1'}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            url = f'http://127.0.0.1:{port}'
+        results = {}
+        try:
+            if server is not None:
+                _wait_for_port(port, server)
+            for name, route, method, path, body, content_type in endpoints:
+                #La API se autentica con JWT (sin CSRF); las vistas HTML con la sesion
+                if path.startswith('/api/'):
+                    headers = {'Authorization': f'Bearer {InventoryRefreshToken.for_user(admin).access_token}'}
+                else:
+                    headers = {'Cookie': f'{settings.SESSION_COOKIE_NAME}={session}'}
+                if content_type:
+                    headers['Content-Type'] = content_type
+                if name == 'api-register':
+                    suffix = uuid.uuid4().hex[:8]
+                    requests = [
+                        (name, method, path, _encode({
+                            'email': f'bench-{suffix}-{i}@example.com', 'username': f'bench-{suffix}-{i}', 'password': options['password'],
+                            'first_name': 'Bench', 'last_name': 'Bench', 'address': 'Benchmark',
+                        }))
+                        for i in range(options['requests'] + options['warmup'])
+                    ]
+                else:
+                    requests = [(name, method, path, _encode(body))]
+                if options['warmup']:
+                    asyncio.run(http_load(url, requests, options['warmup'], min(options['warmup'], options['concurrency']), headers))
+                    requests = requests[options['warmup']:] or requests
+                run = asyncio.run(http_load(url, requests, options['requests'], options['concurrency'], headers))
+                results[name] = {'route': route, 'method': method, 'errors': run['errors'], **run['endpoints'][name]}
+                self.stderr.write(f"{name}: {results[name]['requests_per_second']:.1f} req/s, p95 {results[name]['p95_ms'] or 0:.1f} ms")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+        routes = set(_routes(get_resolver().url_patterns))
+        result = {
+            'label': options['label'],
+            'commit': _commit(),
+            'vendor': connection.vendor,
+            'async_read_views': settings.ASYNC_READ_VIEWS,
+            'concurrency': options['concurrency'],
+            'requests_per_endpoint': options['requests'],
+            'rows': {
+                'products': Product.objects.count(),
+                'users': CustomUser.objects.count(),
+                'entries': InventoryEntry.objects.count(),
+                'exits': InventoryExit.objects.count(),
+                'tickets': Ticket.objects.count(),
+            },
+            'endpoints': results,
+            'skipped': SKIPPED,
+            'not_measured': sorted(routes - measured_routes - set(SKIPPED)),
+        }
+        output = json.dumps(result, default=str)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,21 @@
+import json
+from django.core.management.base import BaseCommand
+from app.catalog import IMPORT_CHUNK_SIZE, import_products
+
+
+class Command(BaseCommand):
+    help = 'Importa el catalogo de productos desde un CSV (id,name,description,stock,min_stock,price). Las filas con id existente se actualizan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        with open(options['path'], newline='', encoding='utf-8-sig') as csv_file:
+            result = import_products(csv_file, chunk_size=options['chunk_size'])
+        for error in result['errors']:
+            self.stderr.write(f"Linea {error['line']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['imported']} productos importados, {len(result['errors'])} con errores "
+            f"en {result['seconds']:.2f}s ({result['rows_per_second']:.0f} filas/s)"
+        ))
@@ -0,0 +1,41 @@
+import asyncio
+import json
+from django.core.management.base import BaseCommand
+from ._bench import http_load
+
+
+class Command(BaseCommand):
+    help = ('Mide la latencia del login de usuarios reales mientras otra IP lanza un ataque de credenciales '
+            'a ritmo fijo contra /api/login/. El servidor debe iniciarse con LOGIN_THROTTLE_IP_HEADER=HTTP_X_REAL_IP '
+            'para distinguir la IP del ataque de la de los usuarios (ambos salen de esta maquina).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--email', required=True, help='Usuario real con el que se mide el login.')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--rate', type=int, default=1000, help='Intentos del ataque por segundo.')
+        parser.add_argument('--seconds', type=int, default=10)
+        parser.add_argument('--attack-concurrency', type=int, default=500)
+        parser.add_argument('--legit-concurrency', type=int, default=4)
+        parser.add_argument('--legit-requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        attack = [
+            ('attack', 'POST', '/api/login/', json.dumps({'email': f'victim{i}@example.com', 'password': 'guess'}).encode())
+            for i in range(100)
+        ]
+        legit = [('legit', 'POST', '/api/login/', json.dumps({'email': options['email'], 'password': options['password']}).encode())]
+
+        async def run():
+            return await asyncio.gather(
+                http_load(options['url'], attack, options['rate'] * options['seconds'], options['attack_concurrency'],
+                          {'Content-Type': 'application/json', 'X-Real-IP': '203.0.113.10'}, rate=options['rate']),
+                http_load(options['url'], legit, options['legit_requests'], options['legit_concurrency'],
+                          {'Content-Type': 'application/json', 'X-Real-IP': '198.51.100.20'}),
+            )
+
+        attack_result, legit_result = asyncio.run(run())
+        self.stdout.write(json.dumps({
+            'attack': {**attack_result['endpoints']['attack'], 'achieved_rate': attack_result['requests_per_second'], 'errors': attack_result['errors']},
+            'legit': {**legit_result['endpoints']['legit'], 'errors': legit_result['errors']},
+        }))
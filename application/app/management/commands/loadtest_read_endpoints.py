@@ -0,0 +1,37 @@
+import asyncio
+import json
+from django.core.management.base import BaseCommand
+from ._bench import http_load
+
+
+class Command(BaseCommand):
+    help = ('Prueba de carga de las vistas JSON de lectura contra un servidor en marcha. Para comparar '
+            'modos, ejecutar el servidor ASGI con ASYNC_READ_VIEWS=0 y luego con ASYNC_READ_VIEWS=1 '
+            '(por ejemplo: uvicorn application.asgi:application) y comparar la salida JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=1000, help='Conexiones simultaneas (revisar ulimit -n).')
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--product', type=int, default=1)
+        parser.add_argument('--ticket', type=int, default=1)
+        parser.add_argument('--session', help='Cookie sessionid de un usuario autenticado.')
+        parser.add_argument('--token', help='Token JWT de acceso para la API.')
+        parser.add_argument('--label', default='', help='Etiqueta del modo medido (sync/async).')
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['session']:
+            headers['Cookie'] = f"sessionid={options['session']}"
+        if options['token']:
+            headers['Authorization'] = f"Bearer {options['token']}"
+        requests = [
+            ('get_product_stock', 'GET', f"/get_product_stock/{options['product']}/", b''),
+            ('inventory_consult_data', 'GET', '/inventory_consult_data/', b''),
+            ('get_tickets', 'GET', '/tickets/', b''),
+            ('get_ticket_details', 'GET', f"/tickets/{options['ticket']}/", b''),
+            ('product_stock_api', 'GET', f"/api/products/{options['product']}/stock/", b''),
+        ]
+        result = asyncio.run(http_load(options['url'], requests, options['requests'], options['concurrency'], headers))
+        result.update({'label': options['label'], 'concurrency': options['concurrency']})
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,116 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from app.models import InventoryEntry, InventoryExit
+
+#Tablas del historial y la columna de fecha por la que se particionan
+LEDGER_MODELS = {
+    'entries': (InventoryEntry, 'date_received'),
+    'exits': (InventoryExit, 'date_sold'),
+}
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+def _next_month(day):
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+def _months(first, last):
+    month = _month_start(first)
+    while month <= last:
+        yield month
+        month = _next_month(month)
+
+def _months_ahead(count):
+    last = timezone.localdate()
+    for _ in range(count):
+        last = _next_month(last)
+    return last
+
+def _is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+def _create_partitions(cursor, table, months):
+    qn = connection.ops.quote_name
+    created = 0
+    for month in months:
+        partition = f'{table}_{month:%Y%m}'
+        cursor.execute("SELECT to_regclass(%s)", [partition])
+        if cursor.fetchone()[0] is not None:
+            continue
+        cursor.execute(
+            f"CREATE TABLE {qn(partition)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            [month, _next_month(month)],
+        )
+        created += 1
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+    return created
+
+#Convierte la tabla en una tabla particionada por rango mensual de la fecha. PostgreSQL exige que
+#la llave primaria incluya la columna de particion, asi que pasa a ser (id, fecha); la unicidad del
+#id la sigue garantizando la secuencia de identidad, que es lo unico que usa el ORM
+def _convert(cursor, model, date_column, months_ahead):
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    old_table = f'{table}_unpartitioned'
+    product_column = model._meta.get_field('product').column
+    product_table = model._meta.get_field('product').related_model._meta.db_table
+
+    cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+    cursor.execute(f"SELECT min({qn(date_column)}) FROM {qn(table)}")
+    first = cursor.fetchone()[0] or timezone.localdate()
+    cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+    cursor.execute(
+        f"CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+        f"PARTITION BY RANGE ({qn(date_column)})"
+    )
+    created = _create_partitions(cursor, table, _months(first, _months_ahead(months_ahead)))
+
+    cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}")
+    cursor.execute(f"SELECT coalesce(max(id), 0) FROM {qn(table)}")
+    last_id = cursor.fetchone()[0]
+    if last_id:
+        cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [table, last_id])
+    #Los nombres de la llave primaria y de los indices siguen ocupados por la tabla vieja hasta borrarla
+    cursor.execute(f"DROP TABLE {qn(old_table)}")
+    cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {qn(date_column)})")
+    cursor.execute(
+        f"ALTER TABLE {qn(table)} ADD FOREIGN KEY ({qn(product_column)}) REFERENCES {qn(product_table)} (id) "
+        f"DEFERRABLE INITIALLY DEFERRED"
+    )
+    cursor.execute(f"CREATE INDEX {qn(table + '_' + product_column)} ON {qn(table)} ({qn(product_column)})")
+    with connection.schema_editor(atomic=False) as editor:
+        for index in model._meta.indexes:
+            editor.add_index(model, index)
+    return created
+
+
+class Command(BaseCommand):
+    help = ('Particiona por mes (rango de fecha) las tablas de entradas y salidas en PostgreSQL. La primera '
+            'ejecucion convierte la tabla; las siguientes solo crean las particiones de los meses por venir, '
+            'asi que conviene programarla una vez al mes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=['entries', 'exits', 'all'], default='all')
+        parser.add_argument('--months-ahead', type=int, default=3, help='Meses futuros con particion ya creada.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El particionado declarativo requiere PostgreSQL.')
+        names = list(LEDGER_MODELS) if options['table'] == 'all' else [options['table']]
+        for name in names:
+            model, date_field = LEDGER_MODELS[name]
+            table = model._meta.db_table
+            date_column = model._meta.get_field(date_field).column
+            with transaction.atomic(), connection.cursor() as cursor:
+                if _is_partitioned(cursor, table):
+                    months = _months(timezone.localdate(), _months_ahead(options['months_ahead']))
+                    created = _create_partitions(cursor, table, months)
+                    self.stdout.write(f'{table}: {created} particiones nuevas')
+                else:
+                    created = _convert(cursor, model, date_column, options['months_ahead'])
+                    self.stdout.write(f'{table}: convertida a tabla particionada con {created} particiones mensuales')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from app.reports import rebuild_daily_movements
+
+
+class Command(BaseCommand):
+    help = ('Reconstruye DailyStockMovement desde el historial de entradas y salidas, completo o solo '
+            'entre --from y --to. Conviene ejecutarlo sin movimientos en curso en ese rango.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='Fecha inicial (AAAA-MM-DD).')
+        parser.add_argument('--to', dest='date_to', help='Fecha final (AAAA-MM-DD).')
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ['date_from', 'date_to']:
+            value = options[name]
+            if value is not None:
+                dates[name] = parse_date(value)
+                if dates[name] is None:
+                    raise CommandError(f'Fecha invalida: {value}')
+        rows = rebuild_daily_movements(**dates)
+        self.stdout.write(self.style.SUCCESS(f'{rows} filas diarias reconstruidas.'))
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+from app.models import Product
+from app.sales import rebuild_sales_summary
+
+
+class Command(BaseCommand):
+    help = ('Reconstruye ProductSalesSummary desde el historial de InventoryExit, por rangos de id de '
+            'producto procesados en paralelo. Conviene ejecutarlo sin ventas en curso.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Productos por rango.')
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        bounds = Product.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write('No hay productos.')
+            return
+        chunk_size = options['chunk_size']
+        ranges = [(start, start + chunk_size) for start in range(bounds['first'], bounds['last'] + 1, chunk_size)]
+
+        def rebuild(bounds):
+            try:
+                return rebuild_sales_summary(*bounds)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            products_with_sales = sum(executor.map(rebuild, ranges))
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumen reconstruido en {len(ranges)} rangos: {products_with_sales} productos con ventas.'
+        ))
@@ -0,0 +1,63 @@
+import json
+import time
+from contextlib import nullcontext
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from app.models import CustomUser, InventoryEntry, InventoryExit, Product, Role, Ticket
+from app.reports import rebuild_daily_movements
+from ._bench import seed_dated_entries, seed_dated_exits, seed_products, seed_tickets, seed_users
+
+BENCH_EMAIL = 'bench@example.com'
+
+
+class Command(BaseCommand):
+    help = ('Siembra datos sinteticos para benchmark_endpoints con cargas por lotes (generate_series en '
+            'PostgreSQL) y reconstruye los resumenes derivados. Crea o actualiza el administrador '
+            f'{BENCH_EMAIL} con --password. Los datos se suman a los existentes; usar una base dedicada.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--entries', type=int, default=1000000)
+        parser.add_argument('--exits', type=int, default=1000000)
+        parser.add_argument('--tickets', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=365, help='Dias de historial sobre los que se reparten los movimientos.')
+        parser.add_argument('--password', default='bench-password', help='Contraseña del administrador y de los usuarios sembrados.')
+
+    def handle(self, *args, **options):
+        timings = {}
+
+        #Cada carga va en una transaccion; las reconstrucciones manejan las suyas (la de ventas usa varios hilos)
+        def step(name, func, atomic=True):
+            start = time.perf_counter()
+            with transaction.atomic() if atomic else nullcontext():
+                result = func()
+            timings[name] = time.perf_counter() - start
+            return result
+
+        product_ids = step('products', lambda: seed_products(options['products']))
+        step('users', lambda: seed_users(options['users'], options['password']))
+        step('entries', lambda: seed_dated_entries(options['entries'], product_ids, options['days']))
+        step('exits', lambda: seed_dated_exits(options['exits'], product_ids, options['days']))
+        step('tickets', lambda: seed_tickets(options['tickets']))
+        step('sales_summary', lambda: call_command('rebuild_sales_summary', stdout=self.stderr), atomic=False)
+        step('daily_movements', rebuild_daily_movements, atomic=False)
+        if connection.vendor == 'postgresql':
+            step('analyze', lambda: connection.cursor().execute('ANALYZE'), atomic=False)
+        admin = CustomUser.objects.filter(email=BENCH_EMAIL).first() or CustomUser(email=BENCH_EMAIL, username='bench')
+        admin.role = Role.objects.get_or_create(pk=1, defaults={'name': 'Admin'})[0]
+        admin.set_password(options['password'])
+        admin.save()
+        self.stdout.write(json.dumps({
+            'vendor': connection.vendor,
+            'seconds': timings,
+            'rows': {
+                'products': Product.objects.count(),
+                'users': CustomUser.objects.count(),
+                'entries': InventoryEntry.objects.count(),
+                'exits': InventoryExit.objects.count(),
+                'tickets': Ticket.objects.count(),
+            },
+            'admin': BENCH_EMAIL,
+        }))
@@ -0,0 +1,207 @@
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse
+from . import stock_cache
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+MAX_LOGGED_QUERIES = 50
+#Cualquier otro metodo se cuenta como "other" para que un cliente no pueda crear series sin limite
+METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE'])
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+_series = {}
+_responses = {}
+
+
+#Metricas por vista: tiempo total, consultas y tiempo en la base, tiempo de renderizado de las
+#respuestas DRF/TemplateResponse y tamaño de la respuesta. Se agregan en histogramas en memoria
+#de este proceso y se exponen en formato de texto de Prometheus en /metrics
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class RequestStats:
+    __slots__ = ('start', 'queries', 'db_time', 'render_time', 'sql')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.sql = []
+
+#Se instala en cada conexion nueva (de cualquier hilo, tambien las de sync_to_async) y solo mide
+#cuando hay una peticion en curso en el contexto. Va al principio de la lista para que el pop()
+#de un connection.execute_wrapper abierto antes de conectar no lo quite
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.queries += 1
+        stats.db_time += elapsed
+        if len(stats.sql) < MAX_LOGGED_QUERIES:
+            stats.sql.append((elapsed, sql))
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+def _observe(view, method, status, stats, duration, size):
+    with _lock:
+        series = _series.get((view, method))
+        if series is None:
+            series = _series[view, method] = {
+                'duration': Histogram(DURATION_BUCKETS),
+                'db': Histogram(DURATION_BUCKETS),
+                'queries': Histogram(QUERY_BUCKETS),
+                'render': Histogram(DURATION_BUCKETS),
+                'size': Histogram(SIZE_BUCKETS),
+            }
+        series['duration'].observe(duration)
+        series['db'].observe(stats.db_time)
+        series['queries'].observe(stats.queries)
+        series['render'].observe(stats.render_time)
+        if size is not None:
+            series['size'].observe(size)
+        _responses[view, method, status] = _responses.get((view, method, status), 0) + 1
+
+def _finish(request, response, stats):
+    duration = time.perf_counter() - stats.start
+    view = _view_name(request)
+    size = None if response.streaming else len(response.content)
+    _observe(view, request.method if request.method in METHODS else 'other', response.status_code, stats, duration, size)
+    #La cabecera revela tiempos y numero de consultas: solo para administradores salvo que se active para todos
+    if getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', False) or getattr(getattr(request, 'user', None), 'role_id', None) == 1:
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+            f'render;dur={stats.render_time * 1000:.1f}, total;dur={duration * 1000:.1f}'
+        )
+    slow = getattr(settings, 'REQUEST_METRICS_SLOW_SECONDS', 1.0)
+    if slow is not None and duration >= slow:
+        logger.warning(
+            'Peticion lenta %s %s (%s): %.3f s, %d consultas en %.3f s\n%s',
+            request.method, request.path, view, duration, stats.queries, stats.db_time,
+            '\n'.join(f'{elapsed * 1000:.1f} ms  {sql}' for elapsed, sql in stats.sql),
+        )
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        _finish(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        _finish(request, response, stats)
+        return response
+
+    #Las respuestas DRF y TemplateResponse se renderizan despues de la vista
+    def process_template_response(self, request, response):
+        stats = _current.get()
+        if stats is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                stats.render_time += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _histogram_lines(name, histogram, labels):
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+    yield f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}'
+    yield f'{name}_sum{{{labels}}} {histogram.sum}'
+    yield f'{name}_count{{{labels}}} {histogram.count}'
+
+HISTOGRAMS = [
+    ('duration', 'inventory_request_duration_seconds', 'Tiempo total de la peticion.'),
+    ('db', 'inventory_request_db_seconds', 'Tiempo en la base de datos por peticion.'),
+    ('queries', 'inventory_request_db_queries', 'Consultas a la base de datos por peticion.'),
+    ('render', 'inventory_request_render_seconds', 'Tiempo de renderizado de respuestas DRF y TemplateResponse.'),
+    ('size', 'inventory_response_size_bytes', 'Tamaño del cuerpo de la respuesta.'),
+]
+
+def render_metrics():
+    lines = []
+    with _lock:
+        for kind, name, help_text in HISTOGRAMS:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (view, method), series in sorted(_series.items()):
+                lines += _histogram_lines(name, series[kind], _labels(view=view, method=method))
+        lines += ['# HELP inventory_responses_total Respuestas por vista y codigo de estado.', '# TYPE inventory_responses_total counter']
+        for (view, method, status), count in sorted(_responses.items()):
+            lines.append(f'inventory_responses_total{{{_labels(view=view, method=method, status=status)}}} {count}')
+    lines += ['# HELP inventory_stock_cache_requests_total Lecturas de la cache de stock.', '# TYPE inventory_stock_cache_requests_total counter']
+    for cache_name, counters in sorted(stock_cache.stats().items()):
+        for outcome, count in sorted(counters.items()):
+            lines.append(f'inventory_stock_cache_requests_total{{{_labels(cache=cache_name, outcome=outcome)}}} {count}')
+    return '\n'.join(lines) + '\n'
+
+def reset():
+    with _lock:
+        _series.clear()
+        _responses.clear()
+
+#Prometheus consulta sin sesion: se permite a las IP de REQUEST_METRICS_ALLOWED_IPS y a los administradores
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'REQUEST_METRICS_ALLOWED_IPS', []) and getattr(request.user, 'role_id', None) != 1:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
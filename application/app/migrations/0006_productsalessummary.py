@@ -0,0 +1,35 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_sales_summary(apps, schema_editor):
+    InventoryExit = apps.get_model('app', 'InventoryExit')
+    Product = apps.get_model('app', 'Product')
+    ProductSalesSummary = apps.get_model('app', 'ProductSalesSummary')
+    totals = dict(InventoryExit.objects.order_by().values('product_id').annotate(total=Sum('quantity_sold')).values_list('product_id', 'total'))
+    ProductSalesSummary.objects.bulk_create(
+        [ProductSalesSummary(product_id=product_id, quantity_sold=totals.get(product_id, 0)) for product_id in Product.objects.values_list('id', flat=True).iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_alter_insufficientstock_quantity_needed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity_sold', models.IntegerField(default=0)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sales_summary', to='app.product')),
+            ],
+        ),
+        migrations.RunPython(populate_sales_summary, migrations.RunPython.noop),
+    ]
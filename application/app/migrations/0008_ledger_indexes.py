@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_product_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryentry',
+            index=models.Index(fields=['product', 'date_received'], name='app_entry_product_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryentry',
+            index=models.Index(fields=['date_received'], name='app_entry_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryexit',
+            index=models.Index(fields=['product', 'date_sold'], name='app_exit_product_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryexit',
+            index=models.Index(fields=['date_sold'], name='app_exit_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name'], name='app_product_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'created_at'], name='app_ticket_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['type', 'created_at'], name='app_ticket_type_created_idx'),
+        ),
+    ]
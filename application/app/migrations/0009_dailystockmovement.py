@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:39
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_daily_movements(apps, schema_editor):
+    InventoryEntry = apps.get_model('app', 'InventoryEntry')
+    InventoryExit = apps.get_model('app', 'InventoryExit')
+    DailyStockMovement = apps.get_model('app', 'DailyStockMovement')
+    totals = defaultdict(lambda: [0, 0])
+    for product_id, day, quantity in InventoryEntry.objects.order_by().values('product_id', 'date_received').annotate(total=Sum('quantity_received')).values_list('product_id', 'date_received', 'total'):
+        totals[product_id, day][0] = quantity
+    for product_id, day, quantity in InventoryExit.objects.order_by().values('product_id', 'date_sold').annotate(total=Sum('quantity_sold')).values_list('product_id', 'date_sold', 'total'):
+        totals[product_id, day][1] = quantity
+    DailyStockMovement.objects.bulk_create(
+        [DailyStockMovement(product_id=product_id, day=day, quantity_received=received, quantity_sold=sold)
+         for (product_id, day), (received, sold) in totals.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity_received', models.IntegerField(default=0)),
+                ('quantity_sold', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_movements', to='app.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='app_daily_movement_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailystockmovement',
+            constraint=models.UniqueConstraint(fields=('product', 'day'), name='app_daily_movement_product_day'),
+        ),
+        migrations.RunPython(populate_daily_movements, migrations.RunPython.noop),
+    ]
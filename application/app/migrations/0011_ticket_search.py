@@ -0,0 +1,62 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+FTS_TRIGGERS = [
+    """CREATE TRIGGER app_ticket_fts_insert AFTER INSERT ON app_ticket BEGIN
+        INSERT INTO app_ticket_fts(rowid, description) VALUES (new.id, new.description);
+    END""",
+    """CREATE TRIGGER app_ticket_fts_delete AFTER DELETE ON app_ticket BEGIN
+        INSERT INTO app_ticket_fts(app_ticket_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    """CREATE TRIGGER app_ticket_fts_update AFTER UPDATE OF description ON app_ticket BEGIN
+        INSERT INTO app_ticket_fts(app_ticket_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO app_ticket_fts(rowid, description) VALUES (new.id, new.description);
+    END""",
+]
+
+
+#Busqueda de texto completo sobre la descripcion de los tickets. En PostgreSQL una columna
+#generada tsvector con indice GIN; en SQLite una tabla FTS5 de contenido externo mantenida por
+#triggers. Otras bases no crean nada y la busqueda usa icontains
+def create_ticket_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "ALTER TABLE app_ticket ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('spanish', coalesce(description, ''))) STORED"
+        )
+        schema_editor.execute("CREATE INDEX app_ticket_search_idx ON app_ticket USING GIN (search_vector)")
+    elif vendor == 'sqlite':
+        schema_editor.execute("CREATE VIRTUAL TABLE app_ticket_fts USING fts5(description, content='app_ticket', content_rowid='id')")
+        for trigger in FTS_TRIGGERS:
+            schema_editor.execute(trigger)
+        schema_editor.execute("INSERT INTO app_ticket_fts(app_ticket_fts) VALUES ('rebuild')")
+
+def drop_ticket_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS app_ticket_search_idx")
+        schema_editor.execute("ALTER TABLE app_ticket DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        for name in ['insert', 'delete', 'update']:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS app_ticket_fts_{name}")
+        schema_editor.execute("DROP TABLE IF EXISTS app_ticket_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_customuser_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(create_ticket_search, drop_ticket_search),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_ticket_search'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='insufficientstock',
+            name='product',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__lt', models.F('min_stock'))), fields=['id'], name='app_product_low_stock_idx'),
+        ),
+        #Las filas de InsufficientStock se derivaban de stock y min_stock de cada producto; se borran
+        #con la tabla y Product.objects.low_stock() las calcula de nuevo. Sus ids no se conservan
+        migrations.DeleteModel(
+            name='InsufficientStock',
+        ),
+    ]
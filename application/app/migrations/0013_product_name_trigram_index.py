@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:10
+
+from django.db import migrations
+
+
+#Indice de trigramas sobre UPPER(name) para las busquedas icontains/istartswith del selector de
+#productos (Django compara UPPER("name"::text) LIKE UPPER(...)). Solo existe en PostgreSQL; en
+#otras bases la busqueda recorre la tabla
+def create_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute("CREATE INDEX IF NOT EXISTS app_product_name_trgm_idx ON app_product USING gin (UPPER(name::text) gin_trgm_ops)")
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS app_product_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_product_low_stock_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_trigram_index, drop_name_trigram_index),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
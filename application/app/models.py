@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.dispatch import receiver
 from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 
 
@@ -37,22 +39,119 @@ class CustomUser(AbstractBaseUser):
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    #Version de los tokens JWT emitidos; si cambia, los tokens anteriores dejan de valer
+    token_version = models.PositiveIntegerField(default=0)
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']  
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['role', 'username'], name='app_user_role_username_idx'),
+        ]
+
+    #Campos copiados en los claims del token: cambiar cualquiera revoca los tokens emitidos
+    TOKEN_CLAIM_FIELDS = ('role_id', 'is_active', 'password')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in instance.__dict__ for name in cls.TOKEN_CLAIM_FIELDS):
+            instance._token_claims = instance._claim_values()
+        return instance
+
+    def _claim_values(self):
+        return tuple(getattr(self, name) for name in self.TOKEN_CLAIM_FIELDS)
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_token_claims', None)
+        if loaded is not None and loaded != self._claim_values():
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_claims = self._claim_values()
+
+    #Al volver a calcular el hash con otro costo (must_update) la contraseña es la misma:
+    #se guarda sin subir token_version
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self._password = None
+            self._token_claims = self._claim_values()
+            self.save(update_fields=['password'])
+        return check_password(raw_password, self.password, setter)
+
+    #Revoca todos los tokens del usuario sin cambiar sus datos (cierre de sesion en todos lados)
+    def revoke_tokens(self):
+        CustomUser.objects.filter(pk=self.pk).update(token_version=F('token_version') + 1)
+        self.refresh_from_db(fields=['token_version'])
+        from .user_cache import invalidate_user, set_token_version
+        pk, version = self.pk, self.token_version
+        transaction.on_commit(lambda: set_token_version(pk, version))
+        transaction.on_commit(lambda: invalidate_user(pk))
+
+    #Los usuarios de user_cache no traen la contraseña sino el hash de sesion ya calculado
+    def get_session_auth_hash(self):
+        session_auth_hash = self.__dict__.get('_session_auth_hash')
+        if session_auth_hash is not None:
+            return session_auth_hash
+        return super().get_session_auth_hash()
+
     def __str__(self):
         return self.email
 
 #Modelos para producto, entrada de inventario y salida de inventario       
+#Los productos con stock bajo el minimo se calculan con una consulta sobre el indice parcial
+#app_product_low_stock_idx en lugar de mantener filas aparte en cada movimiento
+class ProductQuerySet(models.QuerySet):
+    def low_stock(self):
+        return self.filter(stock__lt=F('min_stock')).annotate(quantity_needed=F('min_stock') - F('stock'))
+
 class Product(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
     stock = models.IntegerField()
     min_stock = models.IntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    version = models.BigIntegerField(default=0)
+    #Codigo de barras o SKU que leen los escaneres; los productos sin codigo lo dejan en NULL
+    sku = models.CharField(max_length=64, unique=True, null=True)
+
+    objects = ProductQuerySet.as_manager()
+
+    #El sku leido de la base, para recargar el indice de sku_index solo cuando cambia
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'sku' in instance.__dict__:
+            instance._loaded_sku = instance.sku
+        return instance
+
+    #Sin el sku leido (instancia armada a mano o sku diferido) se asume que cambio
+    def sku_changed(self):
+        return '_loaded_sku' not in self.__dict__ or self._loaded_sku != self.sku
+
+    #Cada cambio sube la version que se usa para los ETag de inventario
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+        if bump:
+            self.version = F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=['version'])
+        self._loaded_sku = self.sku
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name'], name='app_product_name_idx'),
+            models.Index(fields=['price'], name='app_product_price_idx'),
+            models.Index(fields=['id'], condition=Q(stock__lt=F('min_stock')), name='app_product_low_stock_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -62,6 +161,18 @@ class InventoryEntry(models.Model):
     quantity_received = models.IntegerField()
     date_received = models.DateField(auto_now_add=True)
 
+    #Reportes por rango de fechas, global y por producto
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'date_received'], name='app_entry_product_date_idx'),
+            models.Index(fields=['date_received'], name='app_entry_date_idx'),
+        ]
+
+    #La insercion y el ajuste de stock de la señal ocurren en la misma transaccion
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.product.name} - {self.date_received}"
     
@@ -70,18 +181,53 @@ class InventoryExit(models.Model):
     quantity_sold = models.IntegerField()
     date_sold = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'date_sold'], name='app_exit_product_date_idx'),
+            models.Index(fields=['date_sold'], name='app_exit_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.product.name} - {self.date_sold}"
     
-class InsufficientStock(models.Model):
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
-    quantity_needed = models.IntegerField(null=True)
+#Resumen de ventas por producto, mantenido de forma incremental con cada salida
+class ProductSalesSummary(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='sales_summary')
+    quantity_sold = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product.name} - {self.quantity_sold} sold"
+
+#Movimientos agregados por producto y dia; los reportes por semana, mes o año se calculan
+#sobre estas filas en lugar de recorrer el historial completo
+class DailyStockMovement(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_movements')
+    day = models.DateField()
+    quantity_received = models.IntegerField(default=0)
+    quantity_sold = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='app_daily_movement_product_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='app_daily_movement_day_idx'),
+        ]
 
     def __str__(self):
-        if self.quantity_needed is not None:
-            return f"{self.product.name} - {self.quantity_needed} needed"
-        else:
-            return f"{self.product.name} - No quantity needed"
+        return f"{self.product.name} - {self.day}"
+
+#Fila unica con la revision del inventario que usan los ETag (ver revisions.py)
+class InventoryRevision(models.Model):
+    value = models.BigIntegerField(default=0)
 
 #Modelo de ticket
 class Ticket(models.Model):
@@ -95,38 +241,91 @@ class Ticket(models.Model):
     type = models.CharField(max_length=100, choices=TYPE_CHOICES)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    #Listados de tickets filtrados por estado o tipo y ordenados por fecha. La busqueda de texto
+    #usa una columna tsvector (PostgreSQL) o una tabla FTS5 (SQLite) creadas en la migracion 0011
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='app_ticket_status_created_idx'),
+            models.Index(fields=['type', 'created_at'], name='app_ticket_type_created_idx'),
+        ]
+
+#Señales para stock. El producto se pasa por id: solo se actualiza la instancia en memoria si el
+#movimiento ya la tenia cargada, sin volver a leerla de la base
+def _cached_product(instance):
+    return instance._meta.get_field('product').get_cached_value(instance, None)
 
-#Señales para stock
 @receiver(post_save, sender=InventoryEntry)
 def update_product_stock(sender, instance, created, **kwargs):
+    from .stock import apply_stock_delta
+    from .reports import apply_daily_movements
     if created:
-        product = instance.product
-        product.stock += instance.quantity_received
-        product.save()
+        apply_stock_delta(instance.product_id, instance.quantity_received, _cached_product(instance))
+        apply_daily_movements({instance.product_id: (instance.quantity_received, 0)}, instance.date_received)
 
 @receiver(post_save, sender=InventoryExit)
 def update_product_stock_on_exit(sender, instance, created, **kwargs):
+    from .reports import apply_daily_movements
+    from .sales import apply_sales_deltas
+    from .stock import apply_stock_delta
     if created:
-        product = instance.product
-        product.stock -= instance.quantity_sold
-        product.save()
+        apply_stock_delta(instance.product_id, -instance.quantity_sold, _cached_product(instance))
+        apply_sales_deltas({instance.product_id: instance.quantity_sold})
+        apply_daily_movements({instance.product_id: (0, instance.quantity_sold)}, instance.date_sold)
 
 @receiver(post_delete, sender=InventoryExit)
-def update_product_stock_on_exit_delete(sender, instance, **kwargs):
-    product = instance.product
-    product.stock += instance.quantity_sold
-    product.save()
+def update_product_stock_on_exit_delete(sender, instance, origin=None, **kwargs):
+    from .reports import apply_daily_movements
+    from .sales import apply_sales_deltas
+    from .stock import apply_stock_delta
+    #Si se borra el producto completo no hay stock ni resumen que ajustar
+    if isinstance(origin, Product) or getattr(origin, 'model', None) is Product:
+        return
+    apply_stock_delta(instance.product_id, instance.quantity_sold, _cached_product(instance))
+    apply_sales_deltas({instance.product_id: -instance.quantity_sold})
+    apply_daily_movements({instance.product_id: (0, -instance.quantity_sold)}, instance.date_sold)
+
+#El panel tambien muestra el historial: editar un movimiento o borrar una entrada cambia la
+#revision del inventario. Las altas y el borrado de salidas la cambian al ajustar el stock
+@receiver(post_save, sender=InventoryEntry)
+@receiver(post_save, sender=InventoryExit)
+@receiver(post_delete, sender=InventoryEntry)
+def touch_inventory_history(sender, instance, created=False, **kwargs):
+    from .revisions import bump_inventory_revision
+    if not created:
+        transaction.on_commit(bump_inventory_revision)
 
 @receiver(post_save, sender=Product)
-def check_insufficient_stock(sender, instance, **kwargs):
-    if instance.stock < instance.min_stock:
-        quantity_needed = instance.min_stock - instance.stock
-        print(quantity_needed)
-        if quantity_needed is not None:
-            insufficient_stock, created = InsufficientStock.objects.get_or_create(product=instance)
-            insufficient_stock.quantity_needed = quantity_needed
-            insufficient_stock.save()
+@receiver(post_delete, sender=Product)
+def invalidate_product_stock_cache(sender, instance, signal, created=False, update_fields=None, **kwargs):
+    from .revisions import bump_inventory_revision
+    from .stock_cache import invalidate_products
+    from .sku_index import invalidate_index
+    #El pk se copia ahora: al borrar, Django lo deja en None antes del commit
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_products([pk]))
+    transaction.on_commit(bump_inventory_revision)
+    #El indice de sku se recarga completo: solo si el sku del producto cambio
+    if signal is post_delete or created:
+        sku_changed = instance.sku is not None
+    elif update_fields is not None and 'sku' not in update_fields:
+        sku_changed = False
     else:
-        InsufficientStock.objects.filter(product=instance).delete()
-
+        sku_changed = instance.sku_changed()
+    if sku_changed:
+        transaction.on_commit(invalidate_index)
 
+#Los cambios de usuario (rol, datos, contraseña, ultimo login) invalidan su copia en cache
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_cache(sender, instance, signal, update_fields=None, **kwargs):
+    from .user_cache import invalidate_user, set_token_version
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_user(pk))
+    #La version de los tokens se escribe si este guardado la incluyo; al borrar queda vacia
+    if signal is post_delete:
+        transaction.on_commit(lambda: set_token_version(pk, None))
+    elif update_fields is None or 'token_version' in update_fields:
+        version = instance.token_version
+        transaction.on_commit(lambda: set_token_version(pk, version))
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
+from .renderers import dumps
+
+
+#Paginacion por cursor (keyset) sobre el id, estable aunque se inserten filas nuevas
+class LedgerCursorPagination(CursorPagination):
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+def stream_ndjson(queryset, serializer_class, chunk_size=None):
+    chunk_size = chunk_size or getattr(settings, 'STREAM_CHUNK_SIZE', 2000)
+    serializer = serializer_class()
+
+    def rows():
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield dumps(serializer.to_representation(obj), JSONEncoder) + b'\n'
+
+    return StreamingHttpResponse(rows(), content_type='application/x-ndjson')
+
+class CursorListMixin:
+    pagination_class = LedgerCursorPagination
+
+    def list_response(self, request, queryset, serializer_class):
+        if request.query_params.get('stream') == 'ndjson':
+            return stream_ndjson(queryset.order_by('id'), serializer_class)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = serializer_class(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
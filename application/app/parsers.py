@@ -0,0 +1,34 @@
+import codecs
+import json
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+#Una fila JSON por linea; las lineas mal formadas se entregan como texto para que la
+#validacion reporte el error en su propia posicion sin rechazar el lote completo
+class NDJSONParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return []
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        rows = []
+        for line in stream:
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(line)
+        return rows
+
+#Entrega el cuerpo como un iterable de lineas de texto para leer el CSV sin cargarlo entero
+class CSVParser(BaseParser):
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return []
+        return codecs.iterdecode(stream, 'utf-8-sig')
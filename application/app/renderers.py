@@ -0,0 +1,42 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+#Serializacion JSON a bytes con orjson si esta instalado: UUID y tipos basicos se convierten en C;
+#fechas y horas (orjson escribe los microsegundos y DjangoJSONEncoder los recorta a milisegundos),
+#Decimal, lazy strings y el resto pasan por el default() del encoder de siempre, asi el resultado
+#es el mismo que el de JsonResponse. Sin orjson se usa el json de la stdlib
+def dumps(data, encoder_class=DjangoJSONEncoder):
+    if orjson is not None:
+        return orjson.dumps(data, default=encoder_class().default, option=ORJSON_OPTIONS)
+    return json.dumps(data, cls=encoder_class, ensure_ascii=False, separators=(',', ':')).encode()
+
+class FastJsonResponse(HttpResponse):
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data, encoder), **kwargs)
+
+#Respuestas DRF compactas con orjson; con indentacion (API navegable, ?indent) o ensure_ascii se
+#usa el JSONRenderer original
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if orjson is None or self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = dumps(data, self.encoder_class)
+        #Como JSONRenderer: U+2028 y U+2029 escapados para poder incrustar la respuesta en JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,78 @@
+import datetime
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Trunc
+from .models import DailyStockMovement, InventoryEntry, InventoryExit
+from .revisions import bump_inventory_revision
+
+GRANULARITIES = ['day', 'week', 'month', 'year']
+
+
+#Suma movimientos {product_id: (recibido, vendido)} a las filas diarias. Igual que el resumen de
+#ventas: se actualiza primero y las filas que faltan se crean en cero y se vuelven a actualizar.
+#Por defecto usa el mismo dia que asigna auto_now_add a date_received/date_sold
+def apply_daily_movements(movements, day=None):
+    movements = {product_id: quantities for product_id, quantities in movements.items() if any(quantities)}
+    if not movements:
+        return
+    day = day or datetime.date.today()
+    with transaction.atomic():
+        updated = _add_movements(movements, day)
+        if updated < len(movements):
+            existing = set(DailyStockMovement.objects.filter(day=day, product_id__in=movements).values_list('product_id', flat=True))
+            missing = {product_id: quantities for product_id, quantities in movements.items() if product_id not in existing}
+            DailyStockMovement.objects.bulk_create(
+                [DailyStockMovement(product_id=product_id, day=day) for product_id in missing],
+                ignore_conflicts=True,
+            )
+            _add_movements(missing, day)
+
+def _add_movements(movements, day):
+    def delta(position):
+        return Case(*[When(product_id=product_id, then=Value(quantities[position])) for product_id, quantities in movements.items()], default=Value(0))
+    return DailyStockMovement.objects.filter(day=day, product_id__in=movements).update(
+        quantity_received=F('quantity_received') + delta(0),
+        quantity_sold=F('quantity_sold') + delta(1),
+    )
+
+#Totales por producto y periodo entre dos fechas (inclusive). Las semanas, meses y años se
+#agrupan a partir de las filas diarias
+def movement_report(date_from, date_to, granularity='day', product_id=None, fields=('quantity_received', 'quantity_sold')):
+    rows = DailyStockMovement.objects.filter(day__range=(date_from, date_to))
+    if product_id is not None:
+        rows = rows.filter(product_id=product_id)
+    period = F('day') if granularity == 'day' else Trunc('day', granularity)
+    return list(
+        rows.annotate(period=period)
+        .values('product_id', 'period', product_name=F('product__name'))
+        .annotate(**{field: Sum(field) for field in fields})
+        .order_by('period', 'product_id')
+    )
+
+def sales_report(date_from, date_to, granularity='day', product_id=None):
+    return movement_report(date_from, date_to, granularity, product_id, fields=('quantity_sold',))
+
+#Reconstruye las filas diarias desde el historial, completo o para un rango de fechas
+def rebuild_daily_movements(date_from=None, date_to=None):
+    entries = InventoryEntry.objects.order_by()
+    exits = InventoryExit.objects.order_by()
+    rows = DailyStockMovement.objects.all()
+    if date_from is not None:
+        entries, exits, rows = entries.filter(date_received__gte=date_from), exits.filter(date_sold__gte=date_from), rows.filter(day__gte=date_from)
+    if date_to is not None:
+        entries, exits, rows = entries.filter(date_received__lte=date_to), exits.filter(date_sold__lte=date_to), rows.filter(day__lte=date_to)
+    totals = defaultdict(lambda: [0, 0])
+    for product_id, day, quantity in entries.values('product_id', 'date_received').annotate(total=Sum('quantity_received')).values_list('product_id', 'date_received', 'total'):
+        totals[product_id, day][0] = quantity
+    for product_id, day, quantity in exits.values('product_id', 'date_sold').annotate(total=Sum('quantity_sold')).values_list('product_id', 'date_sold', 'total'):
+        totals[product_id, day][1] = quantity
+    with transaction.atomic():
+        rows.delete()
+        DailyStockMovement.objects.bulk_create(
+            [DailyStockMovement(product_id=product_id, day=day, quantity_received=received, quantity_sold=sold)
+             for (product_id, day), (received, sold) in totals.items()],
+            batch_size=1000,
+        )
+        transaction.on_commit(bump_inventory_revision)
+    return len(totals)
@@ -0,0 +1,47 @@
+from django.db.models import F
+from .models import InventoryRevision, Product, Ticket
+
+INVENTORY_ETAG = 'inventory-{}'
+
+
+#Revision del inventario para los ETag: un contador en la base, compartido por todos los
+#procesos, que sube en el commit de cada movimiento de stock, de cada cambio de un producto o
+#del historial y de cada reconstruccion de los resumenes. Leerla es una consulta por clave primaria
+def inventory_revision():
+    return InventoryRevision.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+async def ainventory_revision():
+    return await InventoryRevision.objects.filter(pk=1).values_list('value', flat=True).afirst() or 0
+
+#Se registra con transaction.on_commit: el UPDATE corre despues del commit de la escritura y no
+#retiene el bloqueo de la fila del contador durante la transaccion
+def bump_inventory_revision():
+    if not InventoryRevision.objects.filter(pk=1).update(value=F('value') + 1):
+        created = InventoryRevision.objects.get_or_create(pk=1, defaults={'value': 1})[1]
+        if not created:
+            InventoryRevision.objects.filter(pk=1).update(value=F('value') + 1)
+
+def inventory_etag(request, *args, **kwargs):
+    return INVENTORY_ETAG.format(inventory_revision())
+
+def product_etag(request, pk, *args, **kwargs):
+    version = Product.objects.filter(pk=pk).values_list('version', flat=True).first()
+    if version is None:
+        return None
+    return f"product-{pk}-{version}"
+
+async def ainventory_etag(request, *args, **kwargs):
+    return INVENTORY_ETAG.format(await ainventory_revision())
+
+#El ticket cambia solo al guardarse, que actualiza updated_at
+def ticket_etag(request, ticket_id, *args, **kwargs):
+    updated_at = Ticket.objects.filter(pk=ticket_id).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return f"ticket-{ticket_id}-{updated_at.timestamp()}"
+
+async def aticket_etag(request, ticket_id, *args, **kwargs):
+    updated_at = await Ticket.objects.filter(pk=ticket_id).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return None
+    return f"ticket-{ticket_id}-{updated_at.timestamp()}"
@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from . import events
+from .models import InventoryExit, Product, ProductSalesSummary
+from .revisions import bump_inventory_revision
+
+
+#Ventas por producto leidas del resumen materializado: una fila por producto
+def product_sales(products=None):
+    if products is None:
+        products = Product.objects.all()
+    rows = products.order_by('id').values('id', 'name', 'price', quantity_sold=Coalesce(F('sales_summary__quantity_sold'), 0))
+    return [
+        {
+            'product_id': row['id'],
+            'product_name': row['name'],
+            'profit': row['quantity_sold'] * row['price'],
+            'quantity_sold': row['quantity_sold'],
+            'price': row['price'],
+        }
+        for row in rows
+    ]
+
+#Agregado de ventas por producto en una sola consulta agrupada sobre el historial
+def aggregate_product_sales(exits=None):
+    if exits is None:
+        exits = InventoryExit.objects.all()
+    rows = exits.order_by().values('product_id').annotate(quantity_sold=Sum('quantity_sold'))
+    return {row['product_id']: row['quantity_sold'] for row in rows}
+
+#Suma las cantidades vendidas al resumen; las filas que aun no existen se crean en cero
+#(ignorando conflictos con otra transaccion) y se vuelven a actualizar
+def apply_sales_deltas(quantities):
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return
+    with transaction.atomic():
+        updated = _add_quantities(quantities)
+        if updated < len(quantities):
+            existing = set(ProductSalesSummary.objects.filter(product_id__in=quantities).values_list('product_id', flat=True))
+            missing = {product_id: quantity for product_id, quantity in quantities.items() if product_id not in existing}
+            ProductSalesSummary.objects.bulk_create([ProductSalesSummary(product_id=product_id) for product_id in missing], ignore_conflicts=True)
+            _add_quantities(missing)
+        transaction.on_commit(lambda: _publish_sales(list(quantities)))
+
+def _publish_sales(product_ids):
+    if events.broker.has_subscribers():
+        for row in product_sales(Product.objects.filter(pk__in=product_ids)):
+            events.broker.publish('sale', row)
+
+def _add_quantities(quantities):
+    if len(quantities) == 1:
+        delta = Value(next(iter(quantities.values())))
+    else:
+        delta = Case(*[When(product_id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()], default=Value(0))
+    return ProductSalesSummary.objects.filter(product_id__in=quantities).update(quantity_sold=F('quantity_sold') + delta)
+
+#Reconstruye el resumen para los productos con id en [start_id, end_id)
+def rebuild_sales_summary(start_id, end_id):
+    totals = aggregate_product_sales(InventoryExit.objects.filter(product_id__gte=start_id, product_id__lt=end_id))
+    product_ids = Product.objects.filter(id__gte=start_id, id__lt=end_id).values_list('id', flat=True)
+    with transaction.atomic():
+        ProductSalesSummary.objects.filter(product_id__gte=start_id, product_id__lt=end_id).delete()
+        ProductSalesSummary.objects.bulk_create(
+            [ProductSalesSummary(product_id=product_id, quantity_sold=totals.get(product_id, 0)) for product_id in product_ids],
+            batch_size=1000,
+        )
+        transaction.on_commit(bump_inventory_revision)
+    return len(totals)
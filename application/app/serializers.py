@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import CustomUser, InsufficientStock, InventoryEntry, InventoryExit, Product
+from .models import CustomUser, InventoryEntry, InventoryExit, Product
+from .reports import GRANULARITIES
+
+STOCK_BATCH_MAX_IDS = 10000
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -47,6 +50,7 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
+        read_only_fields = ['version']
 
 class InventoryEntrySerializer(serializers.ModelSerializer):
     class Meta:
@@ -58,8 +62,45 @@ class InventoryExitSerializer(serializers.ModelSerializer):
         model = InventoryExit
         fields = '__all__'
 
+#Productos de Product.objects.low_stock(), que anota quantity_needed
+#Mismos campos que la antigua tabla InsufficientStock; ahora hay una fila por producto y su id
+#es el del producto
 class InsufficientStockSerializer(serializers.ModelSerializer):
+    product = serializers.IntegerField(source='id', read_only=True)
+    quantity_needed = serializers.IntegerField(read_only=True)
+
     class Meta:
-        model = InsufficientStock
-        fields = '__all__'
+        model = Product
+        fields = ['id', 'quantity_needed', 'product']
+
+
+class StockBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=STOCK_BATCH_MAX_IDS)
 
+class ScanSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=64)
+    action = serializers.ChoiceField(choices=['sale', 'entry'], default='sale')
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class BulkInventoryEntrySerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity_received = serializers.IntegerField()
+
+class BulkInventoryExitSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity_sold = serializers.IntegerField()
+
+#Parametros de los reportes; from y to son palabras reservadas, por eso se declaran en get_fields
+class ReportQuerySerializer(serializers.Serializer):
+    def get_fields(self):
+        return {
+            'from': serializers.DateField(),
+            'to': serializers.DateField(),
+            'granularity': serializers.ChoiceField(choices=GRANULARITIES, default='day'),
+            'product': serializers.IntegerField(required=False),
+        }
+
+    def validate(self, data):
+        if data['from'] > data['to']:
+            raise serializers.ValidationError({'to': ['Must be on or after "from".']})
+        return data
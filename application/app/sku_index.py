@@ -0,0 +1,65 @@
+import threading
+import time
+from django.core.cache import cache
+from django.db import connection
+from .models import Product
+
+VERSION_KEY = 'sku:index:version'
+
+_lock = threading.Lock()
+_reload_lock = threading.Lock()
+_state = {'version': None, 'index': {}}
+
+
+#Indice sku -> id de producto en memoria de este proceso, cargado completo en la primera lectura.
+#Cada cambio de sku sube una version en la cache compartida; si la version no coincide con la
+#del indice se vuelve a cargar, asi la busqueda solo lee esa version y un dict. Un codigo que no
+#esta en el indice se busca en la base: puede venir de otro proceso con una cache local aparte
+def _new_version():
+    return time.time_ns() // 1000
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+def _current_index(version):
+    with _lock:
+        if _state['version'] == version:
+            return _state['index']
+    return None
+
+def _load(code):
+    return Product.objects.filter(sku=code).values_list('id', flat=True).first()
+
+def lookup(code):
+    code = code.strip()
+    if not code:
+        return None
+    #Dentro de una transaccion se lee de la base: puede haber productos aun sin confirmar
+    if connection.in_atomic_block:
+        return _load(code)
+    version = _shared_version()
+    index = _current_index(version)
+    if index is None:
+        #Un solo hilo recarga; los demas esperan y usan el indice nuevo
+        with _reload_lock:
+            index = _current_index(version)
+            if index is None:
+                index = dict(Product.objects.exclude(sku=None).values_list('sku', 'id'))
+                with _lock:
+                    _state.update(version=version, index=index)
+    product_id = index.get(code)
+    if product_id is None:
+        product_id = _load(code)
+    return product_id
+
+def invalidate_index():
+    with _lock:
+        _state.update(version=None, index={})
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _new_version(), None)
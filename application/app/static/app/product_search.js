@@ -0,0 +1,57 @@
+//Selector de productos con busqueda en el servidor: agrega un campo de texto antes de cada
+//<select data-product-search> y carga las opciones que coinciden mientras se escribe
+(function () {
+    function setup(select) {
+        var input = document.createElement('input');
+        input.type = 'search';
+        input.className = 'form-control mb-2';
+        input.placeholder = 'Buscar producto...';
+        input.autocomplete = 'off';
+        select.parentNode.insertBefore(input, select);
+
+        var timer = null;
+        var controller = null;
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                var text = input.value.trim();
+                if (!text) {
+                    return;
+                }
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+                fetch(select.dataset.productSearch + '?q=' + encodeURIComponent(text), {
+                    credentials: 'same-origin',
+                    headers: {'Accept': 'application/json'},
+                    signal: controller.signal
+                })
+                    .then(function (response) { return response.json(); })
+                    .then(function (data) { fill(select, data.results || []); })
+                    .catch(function (error) {
+                        if (error.name !== 'AbortError') {
+                            console.error(error);
+                        }
+                    });
+            }, 250);
+        });
+    }
+
+    function fill(select, products) {
+        var selected = select.value;
+        select.innerHTML = '';
+        products.forEach(function (product) {
+            var option = document.createElement('option');
+            option.value = product.id;
+            option.textContent = product.name + ' (stock: ' + product.stock + ')';
+            option.selected = String(product.id) === selected;
+            select.appendChild(option);
+        });
+        select.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-product-search]').forEach(setup);
+    });
+})();
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from .models import Product
+from . import events
+from .revisions import bump_inventory_revision
+from .stock_cache import invalidate_products
+
+UPDATE_CHUNK_SIZE = 500
+
+
+#Movimientos de stock: se aplican con UPDATE ... SET stock = stock + delta en la base de datos,
+#nunca leyendo y guardando una instancia en memoria, para no perder actualizaciones concurrentes
+def apply_stock_deltas(deltas):
+    if not deltas:
+        return {}
+    product_ids = sorted(deltas)
+    with transaction.atomic():
+        for start in range(0, len(product_ids), UPDATE_CHUNK_SIZE):
+            chunk = product_ids[start:start + UPDATE_CHUNK_SIZE]
+            if len(chunk) == 1:
+                delta = Value(deltas[chunk[0]])
+            else:
+                delta = Case(*[When(pk=product_id, then=Value(deltas[product_id])) for product_id in chunk], default=Value(0))
+            Product.objects.filter(pk__in=chunk).update(stock=F('stock') + delta, version=F('version') + 1)
+        rows = list(Product.objects.filter(pk__in=product_ids).values('id', 'name', 'stock', 'min_stock'))
+        transaction.on_commit(lambda: invalidate_products(product_ids))
+        transaction.on_commit(bump_inventory_revision)
+        transaction.on_commit(lambda: events.publish_stock(rows))
+        return rows
+
+def apply_stock_delta(product_id, delta, product=None):
+    apply_stock_deltas({product_id: delta})
+    #Si el llamador ya tiene el producto en memoria se mantiene al dia sin volver a guardarlo
+    if product is not None:
+        product.stock += delta
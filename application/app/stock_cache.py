@@ -0,0 +1,158 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import Product
+from .revisions import ainventory_revision, inventory_revision
+
+PRODUCT_VERSION_KEY = 'stock:product:version:{}'
+PRODUCT_KEY = 'stock:product:{}:{}'
+LIST_KEY = 'stock:list:{}'
+LIST_LOCK_KEY = 'stock:list:lock:{}'
+LIST_STALE_KEY = 'stock:list:stale'
+LIST_LOCK_TIMEOUT = 10
+BATCH_CHUNK_SIZE = 1000
+
+_stats_lock = threading.Lock()
+_stats = {'product': {'hits': 0, 'misses': 0}, 'list': {'hits': 0, 'misses': 0}}
+
+
+def _timeout():
+    return getattr(settings, 'STOCK_CACHE_TIMEOUT', 300)
+
+def _count(kind, outcome):
+    with _stats_lock:
+        _stats[kind][outcome] += 1
+
+#Contadores de aciertos y fallos de este proceso
+def stats():
+    with _stats_lock:
+        return {kind: dict(counters) for kind, counters in _stats.items()}
+
+#Stock de un producto, leido de la cache y de la base de datos solo si no esta. La clave lleva
+#una version por producto que sube en el commit de cada escritura: una lectura que cargo el
+#stock antes del commit lo guarda bajo la version vieja, que ya nadie consulta
+def get_product_stock(product_id):
+    key = PRODUCT_KEY.format(product_id, _product_version(product_id))
+    stock = cache.get(key)
+    if stock is not None:
+        _count('product', 'hits')
+        return stock
+    _count('product', 'misses')
+    stock = Product.objects.filter(pk=product_id).values_list('stock', flat=True).first()
+    if stock is not None:
+        cache.add(key, stock, _timeout())
+    return stock
+
+#Stock de varios productos: un get_many de las versiones y otro de los valores y, para los que
+#falten, una consulta id__in por bloque. Los productos que no existen no aparecen en el resultado
+def get_products_stock(product_ids):
+    versions = _product_versions(product_ids)
+    keys = {PRODUCT_KEY.format(product_id, version): product_id for product_id, version in versions.items()}
+    stocks = {keys[key]: stock for key, stock in cache.get_many(keys).items()}
+    missing = [product_id for product_id in keys.values() if product_id not in stocks]
+    with _stats_lock:
+        _stats['product']['hits'] += len(stocks)
+        _stats['product']['misses'] += len(missing)
+    loaded = {}
+    for start in range(0, len(missing), BATCH_CHUNK_SIZE):
+        loaded.update(Product.objects.filter(pk__in=missing[start:start + BATCH_CHUNK_SIZE]).values_list('id', 'stock'))
+    if loaded:
+        cache.set_many({PRODUCT_KEY.format(product_id, versions[product_id]): stock for product_id, stock in loaded.items()}, _timeout())
+    stocks.update(loaded)
+    return stocks
+
+#Si la version se pierde (expulsion o reinicio de la cache) se reinicia con la hora actual
+#para no reutilizar una clave vieja
+def _new_version():
+    return time.time_ns() // 1000
+
+def _product_version(product_id):
+    key = PRODUCT_VERSION_KEY.format(product_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+def _product_versions(product_ids):
+    keys = {PRODUCT_VERSION_KEY.format(product_id): product_id for product_id in product_ids}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for key, product_id in keys.items():
+        if product_id not in versions:
+            cache.add(key, _new_version(), None)
+            versions[product_id] = cache.get(key)
+    return versions
+
+#Lista id/name/stock de todos los productos junto con la revision del inventario que le
+#corresponde. La clave lleva la revision vigente, leida de la base para que todos los procesos
+#vean los cambios; cuando cambia, un solo proceso la reconstruye y el resto sirve la ultima lista
+#conocida, con su propia revision, mientras tanto
+def get_stock_list_revision():
+    version = inventory_revision()
+    key = LIST_KEY.format(version)
+    data = cache.get(key)
+    if data is not None:
+        _count('list', 'hits')
+        return version, data
+    _count('list', 'misses')
+    if not cache.add(LIST_LOCK_KEY.format(version), 1, LIST_LOCK_TIMEOUT):
+        stale = cache.get(LIST_STALE_KEY)
+        if stale is not None:
+            return stale
+    data = list(Product.objects.order_by('id').values('id', 'name', 'stock'))
+    cache.set_many({key: data, LIST_STALE_KEY: (version, data)}, _timeout())
+    return version, data
+
+def get_stock_list():
+    return get_stock_list_revision()[1]
+
+#Variantes asincronas para las vistas ASGI; misma logica con la API asincrona de la cache y del ORM
+async def aget_product_stock(product_id):
+    key = PRODUCT_KEY.format(product_id, await _aproduct_version(product_id))
+    stock = await cache.aget(key)
+    if stock is not None:
+        _count('product', 'hits')
+        return stock
+    _count('product', 'misses')
+    stock = await Product.objects.filter(pk=product_id).values_list('stock', flat=True).afirst()
+    if stock is not None:
+        await cache.aadd(key, stock, _timeout())
+    return stock
+
+async def _aproduct_version(product_id):
+    key = PRODUCT_VERSION_KEY.format(product_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), None)
+        version = await cache.aget(key)
+    return version
+
+async def aget_stock_list_revision():
+    version = await ainventory_revision()
+    key = LIST_KEY.format(version)
+    data = await cache.aget(key)
+    if data is not None:
+        _count('list', 'hits')
+        return version, data
+    _count('list', 'misses')
+    if not await cache.aadd(LIST_LOCK_KEY.format(version), 1, LIST_LOCK_TIMEOUT):
+        stale = await cache.aget(LIST_STALE_KEY)
+        if stale is not None:
+            return stale
+    data = [row async for row in Product.objects.order_by('id').values('id', 'name', 'stock')]
+    await cache.aset_many({key: data, LIST_STALE_KEY: (version, data)}, _timeout())
+    return version, data
+
+async def aget_stock_list():
+    return (await aget_stock_list_revision())[1]
+
+#Invalida el stock de los productos dados; la lista cambia de clave con la revision del
+#inventario. Sin version del producto en la cache no hay nada que invalidar: la siguiente
+#lectura crea una nueva despues del commit
+def invalidate_products(product_ids):
+    for product_id in product_ids:
+        try:
+            cache.incr(PRODUCT_VERSION_KEY.format(product_id))
+        except ValueError:
+            pass
@@ -1,11 +1,32 @@
+import json
+import datetime
+import uuid
+from decimal import Decimal
+import asyncio
+from asgiref.sync import sync_to_async
+from unittest import mock
 from typing import Self
-from django.test import TestCase
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import IntegrityError, connection
 from rest_framework import status
 from django.utils import timezone
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.core.management import CommandError, call_command
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from .form import CustomUserCreationForm, InventoryExitForm
 from rest_framework.test import APIClient, force_authenticate, APIRequestFactory
-from .models import CustomUser, InsufficientStock, Product, InventoryEntry, InventoryExit, Role
+from .models import CustomUser, DailyStockMovement, Product, InventoryEntry, InventoryExit, ProductSalesSummary, Role, Ticket
+from . import async_views, events, metrics, renderers, sku_index, stock_cache, throttling, tickets, user_cache
+from .events import EventBroker
+from .renderers import FastJSONRenderer, FastJsonResponse
+from .reports import rebuild_daily_movements
+from .sales import rebuild_sales_summary
+from .stock import apply_stock_deltas
+from .revisions import bump_inventory_revision, inventory_revision
+from .catalog import import_products
 from .serializers import CustomUserSerializer, LoginSerializer, ProfileSerializer, ProductSerializer, InventoryEntrySerializer, InventoryExitSerializer
 from app.views import InsufficientStockListAPIView, InventoryEntryCreateAPIView, InventoryEntryListAPIView, InventoryExitCreateAPIView, InventoryExitListAPIView, ProductDetailAPIView, ProductStockAPIView
 
@@ -92,20 +113,17 @@ class InventoryExitModelTestCase(TestCase):
         )
         self.assertEqual(str(exit), f'Camisa - {exit.date_sold}')
 
-class InsufficientStockModelTestCase(TestCase):
-    def test_str_method_quantity_needed(self):
+class ProductLowStockTestCase(TestCase):
+    def test_low_stock_quantity_needed(self):
         product = Product.objects.create(
             name='Camisa',
             description='Una camisa elegante',
-            stock=10,
+            stock=2,
             min_stock=5,
             price=20.99
         )
-        insufficient_stock = InsufficientStock.objects.create(
-            product=product,
-            quantity_needed=3
-        )
-        self.assertEqual(str(insufficient_stock), 'Camisa - 3 needed')
+        Product.objects.create(name='Pantalon', description='Un pantalon', stock=5, min_stock=5, price=20.99)
+        self.assertEqual(list(Product.objects.low_stock().values_list('id', 'quantity_needed')), [(product.id, 3)])
 
 ##Test para las señales
 
@@ -127,6 +145,14 @@ class SignalsTestCase(TestCase):
         exit.delete()
         self.assertEqual(self.product.stock, 100)
 
+    def test_signals_do_not_load_product(self):
+        exit = InventoryExit.objects.create(product_id=self.product.id, quantity_sold=20, date_sold=timezone.now())
+        exit = InventoryExit.objects.get(pk=exit.pk)
+        exit.delete()
+        self.assertFalse(InventoryExit.product.is_cached(exit))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 100)
+
 ##Test para los serializadores
 
 User = get_user_model()
@@ -415,6 +441,1071 @@ class InsufficientStockListAPIViewTestCase(TestCase):
         force_authenticate(request, user=self.user)
         response = InsufficientStockListAPIView.as_view()(request)
         self.assertEqual(response.status_code, 200)
+        product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=1, min_stock=5, price='10.00')
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        response = InsufficientStockListAPIView.as_view()(request)
+        self.assertEqual(response.data['results'], [{'id': product.id, 'quantity_needed': 4, 'product': product.id}])
+
+##Test para el agregado de ventas
+
+class InventoryInformationDashboardTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=100, min_stock=5, price='10.00')
+        self.homonym = Product.objects.create(name='Camisa', description='Otra camisa', stock=100, min_stock=5, price='20.00')
+        InventoryExit.objects.create(product=self.product, quantity_sold=3)
+        InventoryExit.objects.create(product=self.product, quantity_sold=2)
+        InventoryExit.objects.create(product=self.homonym, quantity_sold=1)
+
+    def test_sales_grouped_per_product(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/inventory_information_dashboard/')
+        self.assertEqual(response.status_code, 200)
+        sales = response.json()['products_with_insufficient_stock']
+        self.assertEqual(sales, [
+            {'product_id': self.product.id, 'product_name': 'Camisa', 'profit': '50.00', 'quantity_sold': 5, 'price': '10.00'},
+            {'product_id': self.homonym.id, 'product_name': 'Camisa', 'profit': '20.00', 'quantity_sold': 1, 'price': '20.00'},
+        ])
+
+##Test para la paginacion de los listados
+
+class InventoryListPaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=100, min_stock=5, price='10.00')
+        self.exits = [InventoryExit.objects.create(product=self.product, quantity_sold=i) for i in range(1, 4)]
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_pagination(self):
+        response = self.client.get('/api/inventory/exits/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.exits[2].id, self.exits[1].id])
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.exits[0].id])
+        self.assertIsNone(response.data['next'])
+
+    def test_ndjson_stream(self):
+        response = self.client.get('/api/inventory/exits/', {'stream': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['quantity_sold'] for line in lines], [1, 2, 3])
+
+##Test para el servicio de movimientos de stock
+
+class StockServiceTestCase(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=10, min_stock=5, price='10.00')
+
+    def test_stale_instance_does_not_overwrite_stock(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        InventoryExit.objects.create(product=self.product, quantity_sold=3)
+        InventoryExit.objects.create(product=stale, quantity_sold=2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_apply_stock_deltas_updates_low_stock(self):
+        other = Product.objects.create(name='Pantalon', description='Un pantalon', stock=3, min_stock=5, price='10.00')
+        self.assertEqual(Product.objects.low_stock().get(pk=other.pk).quantity_needed, 2)
+        apply_stock_deltas({self.product.pk: -8, other.pk: 1})
+        self.assertEqual(Product.objects.low_stock().get(pk=self.product.pk).quantity_needed, 3)
+        self.assertEqual(Product.objects.low_stock().get(pk=other.pk).quantity_needed, 1)
+        apply_stock_deltas({self.product.pk: 8, other.pk: 1})
+        self.assertFalse(Product.objects.low_stock().exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+##Test para la ingesta masiva
+
+class InventoryBulkCreateAPIViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=10, min_stock=5, price='10.00')
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_exits_json(self):
+        rows = [
+            {'product': self.product.id, 'quantity_sold': 2},
+            {'product': 999999, 'quantity_sold': 1},
+            {'product': self.product.id, 'quantity_sold': 'x'},
+            {'product': self.product.id, 'quantity_sold': 4},
+        ]
+        response = self.client.post('/api/inventory/exits/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('product', response.data['errors'][0]['errors'])
+        self.assertIn('quantity_sold', response.data['errors'][1]['errors'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 4)
+        self.assertEqual(InventoryExit.objects.count(), 2)
+        self.assertEqual(Product.objects.low_stock().get(pk=self.product.pk).quantity_needed, 1)
+
+    def test_bulk_entries_ndjson(self):
+        body = '{"product": %d, "quantity_received": 5}\nnot json\n\n{"product": %d, "quantity_received": 1}\n' % (self.product.id, self.product.id)
+        response = self.client.post('/api/inventory/entries/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 16)
+
+    def test_bulk_requires_list(self):
+        response = self.client.post('/api/inventory/entries/bulk/', {'product': self.product.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+##Test para la importacion y exportacion del catalogo
+
+class ProductCatalogAPIViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.role = Role.objects.get(id=1)
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword', role=self.role)
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=10, min_stock=5, price='10.00')
+        self.client.force_authenticate(user=self.user)
+
+    def test_import_csv(self):
+        body = (
+            'id,name,description,stock,min_stock,price\n'
+            f'{self.product.id},Camisa azul,Una camisa azul,2,5,12.50\n'
+            ',Pantalon,Un pantalon,20,5,30.00\n'
+            ',,Sin nombre,1,1,1.00\n'
+        )
+        response = self.client.post('/api/products/import/', body, content_type='text/csv')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['errors'][0]['line'], 4)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, 'Camisa azul')
+        self.assertEqual(Product.objects.low_stock().get(pk=self.product.pk).quantity_needed, 3)
+        self.assertTrue(Product.objects.filter(name='Pantalon').exists())
+
+    def test_import_mixed_ids_does_not_overwrite(self):
+        next_id = self.product.id + 1
+        lines = [
+            'id,name,description,stock,min_stock,price\n',
+            ',Nuevo 1,Sin id,1,1,1.00\n',
+            f'{next_id},Explicito 1,Con id,1,1,1.00\n',
+            ',Nuevo 2,Sin id,1,1,1.00\n',
+            f'{next_id + 1},Explicito 2,Con id,1,1,1.00\n',
+            ',Nuevo 3,Sin id,1,1,1.00\n',
+        ]
+        result = import_products(lines, chunk_size=2)
+        #Nuevo 1 y Nuevo 2 se insertan al llenarse el bloque, despues de escribir el id explicito
+        #pendiente: el siguiente id explicito ya pertenece a uno de ellos y no se pisa
+        self.assertEqual(result['imported'], 4)
+        self.assertEqual([error['line'] for error in result['errors']], [5])
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertEqual(Product.objects.get(pk=next_id).name, 'Explicito 1')
+        self.assertFalse(Product.objects.filter(name='Explicito 2').exists())
+        self.assertEqual(sorted(Product.objects.filter(description='Sin id').values_list('name', flat=True)), ['Nuevo 1', 'Nuevo 2', 'Nuevo 3'])
+        self.assertEqual(Product.objects.get(pk=self.product.id).name, 'Camisa')
+
+    def test_import_inserts_new_rows_by_chunk(self):
+        lines = ['name,description,stock,min_stock,price\n'] + [f'Nuevo {i},Sin id,1,1,1.00\n' for i in range(5)]
+        with mock.patch('app.catalog.Product.objects.bulk_create', wraps=Product.objects.bulk_create) as bulk_create:
+            self.assertEqual(import_products(lines, chunk_size=2)['imported'], 5)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+
+    def test_import_sku(self):
+        self.product.sku = '7501234567890'
+        self.product.save()
+        lines = [
+            'id,name,description,stock,min_stock,price,sku\n',
+            f'{self.product.id},Camisa,Una camisa,10,5,10.00,7501234567890\n',
+            ',Gorra,Una gorra,1,1,1.00,7500000000001\n',
+            ',Bufanda,Una bufanda,1,1,1.00,7500000000001\n',
+            ',Calcetin,Un calcetin,1,1,1.00,7501234567890\n',
+            ',Cinturon,Un cinturon,1,1,1.00,\n',
+        ]
+        result = import_products(lines)
+        self.assertEqual(result['imported'], 3)
+        self.assertEqual([error['line'] for error in result['errors']], [4, 5])
+        self.assertEqual(Product.objects.get(name='Gorra').sku, '7500000000001')
+        self.assertIsNone(Product.objects.get(name='Cinturon').sku)
+        #Sin columna sku se conserva el sku guardado
+        import_products(['id,name,description,stock,min_stock,price\n', f'{self.product.id},Camisa roja,Una camisa,10,5,10.00\n'])
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.name, self.product.sku), ('Camisa roja', '7501234567890'))
+
+    def test_import_requires_admin(self):
+        self.client.force_authenticate(user=User.objects.create_user(email='other@example.com', username='other', password='testpassword'))
+        response = self.client.post('/api/products/import/', 'name\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_csv(self):
+        response = self.client.get('/api/products/export/')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['id,name,description,stock,min_stock,price,sku', f'{self.product.id},Camisa,Una camisa elegante,10,5,10.00,'])
+
+##Test para el resumen de ventas
+
+class ProductSalesSummaryTestCase(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=100, min_stock=5, price='10.00')
+
+    def test_summary_follows_exits(self):
+        exit = InventoryExit.objects.create(product=self.product, quantity_sold=3)
+        InventoryExit.objects.create(product=self.product, quantity_sold=4)
+        self.assertEqual(ProductSalesSummary.objects.get(product=self.product).quantity_sold, 7)
+        exit.delete()
+        self.assertEqual(ProductSalesSummary.objects.get(product=self.product).quantity_sold, 4)
+
+    def test_product_delete_cascades(self):
+        InventoryExit.objects.create(product=self.product, quantity_sold=3)
+        self.product.delete()
+        self.assertFalse(ProductSalesSummary.objects.exists())
+
+    def test_rebuild_sales_summary(self):
+        InventoryExit.objects.bulk_create([InventoryExit(product=self.product, quantity_sold=2) for _ in range(5)])
+        ProductSalesSummary.objects.all().delete()
+        rebuild_sales_summary(self.product.id, self.product.id + 1)
+        self.assertEqual(ProductSalesSummary.objects.get(product=self.product).quantity_sold, 10)
+
+##Test para la cache de stock
+
+class StockCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=10, min_stock=5, price='10.00')
+
+    def test_product_stock_read_through(self):
+        self.assertEqual(stock_cache.get_product_stock(self.product.id), 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(stock_cache.get_product_stock(self.product.id), 10)
+        self.assertIsNone(stock_cache.get_product_stock(999999))
+
+    def test_exit_invalidates_stock(self):
+        stock_cache.get_product_stock(self.product.id)
+        stock_cache.get_stock_list()
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryExit.objects.create(product=self.product, quantity_sold=4)
+        self.assertEqual(stock_cache.get_product_stock(self.product.id), 6)
+        self.assertEqual(stock_cache.get_stock_list(), [{'id': self.product.id, 'name': 'Camisa', 'stock': 6}])
+
+    def test_late_read_does_not_restore_old_stock(self):
+        #Una lectura que cargo el stock antes del commit lo guarda despues de la invalidacion
+        key = stock_cache.PRODUCT_KEY.format(self.product.id, stock_cache._product_version(self.product.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryExit.objects.create(product=self.product, quantity_sold=4)
+        cache.add(key, 10)
+        self.assertEqual(stock_cache.get_product_stock(self.product.id), 6)
+        self.assertEqual(stock_cache.get_products_stock([self.product.id]), {self.product.id: 6})
+
+    def test_stale_list_served_while_rebuilding(self):
+        stock_cache.get_stock_list()
+        bump_inventory_revision()
+        cache.add(stock_cache.LIST_LOCK_KEY.format(inventory_revision()), 1)
+        before = stock_cache.stats()['list']['misses']
+        #Solo la lectura de la revision
+        with self.assertNumQueries(1):
+            self.assertEqual(stock_cache.get_stock_list(), [{'id': self.product.id, 'name': 'Camisa', 'stock': 10}])
+        self.assertEqual(stock_cache.stats()['list']['misses'], before + 1)
+
+    def test_batch_stock_read_through(self):
+        other = Product.objects.create(name='Pantalon', description='Un pantalon', stock=0, min_stock=5, price='20.00')
+        stock_cache.get_product_stock(self.product.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(stock_cache.get_products_stock([self.product.id, other.id, 999999]), {self.product.id: 10, other.id: 0})
+        with self.assertNumQueries(0):
+            self.assertEqual(stock_cache.get_products_stock([other.id, self.product.id]), {self.product.id: 10, other.id: 0})
+
+    @mock.patch('app.stock_cache.BATCH_CHUNK_SIZE', 2)
+    def test_batch_stock_chunked(self):
+        products = Product.objects.bulk_create([
+            Product(name=f'Producto {i}', description='Producto', stock=i, min_stock=1, price='1.00') for i in range(5)
+        ])
+        with self.assertNumQueries(3):
+            stocks = stock_cache.get_products_stock([product.id for product in products])
+        self.assertEqual(stocks, {product.id: product.stock for product in products})
+
+    def test_batch_stock_api(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(email='test@example.com', username='testuser', password='testpassword'))
+        response = client.get('/api/products/stock/', {'ids': f'{self.product.id},999999,{self.product.id}'})
+        self.assertEqual(response.json(), {'stock': {str(self.product.id): 10}, 'missing': [999999]})
+        response = client.post('/api/products/stock/', {'ids': [self.product.id] * 3}, format='json')
+        self.assertEqual(response.json(), {'stock': {str(self.product.id): 10}, 'missing': []})
+        self.assertEqual(client.get('/api/products/stock/', {'ids': '1,x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(client.get('/api/products/stock/').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(client.post('/api/products/stock/', {'ids': list(range(1, 10002))}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+##Test para los ETag de inventario
+
+class InventoryConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=10, min_stock=5, price='10.00')
+        self.client.force_login(self.user)
+
+    def test_not_modified_until_stock_changes(self):
+        for url in ['/inventory_consult_data/', '/inventory_information_dashboard/']:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            with self.captureOnCommitCallbacks(execute=True):
+                InventoryEntry.objects.create(product=self.product, quantity_received=1)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_revision_changes_with_every_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = InventoryEntry.objects.create(product=self.product, quantity_received=1)
+            exit = InventoryExit.objects.create(product=self.product, quantity_sold=1)
+        writes = [
+            lambda: Product.objects.filter(pk=self.product.pk).first().save(),
+            lambda: InventoryExit.objects.get(pk=exit.pk).save(),
+            entry.delete,
+            exit.delete,
+            lambda: rebuild_sales_summary(0, self.product.pk + 1),
+            rebuild_daily_movements,
+        ]
+        for write in writes:
+            revision = inventory_revision()
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            self.assertNotEqual(inventory_revision(), revision, write)
+        #La revision esta en la base: otro proceso, con otra cache, ve la misma
+        revision = inventory_revision()
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(inventory_revision(), revision)
+
+    def test_stale_list_keeps_its_own_etag(self):
+        etag = self.client.get('/inventory_consult_data/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryEntry.objects.create(product=self.product, quantity_received=1)
+        #Otro proceso esta reconstruyendo la lista: se sirve la anterior con su propio ETag
+        cache.add(stock_cache.LIST_LOCK_KEY.format(inventory_revision()), 1)
+        response = self.client.get('/inventory_consult_data/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['inventory'][0]['stock'], 10)
+        self.assertEqual(response['ETag'], etag)
+        cache.delete(stock_cache.LIST_LOCK_KEY.format(inventory_revision()))
+        response = self.client.get('/inventory_consult_data/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['inventory'][0]['stock'], 11)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_product_detail_etag(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/api/products/{self.product.pk}/'
+        etag = client.get(url)['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.product.description = 'Otra descripcion'
+        self.product.save()
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+##Test para los eventos en vivo
+
+class EventBrokerTestCase(SimpleTestCase):
+    async def test_publish_from_thread_reaches_subscriber(self):
+        broker = EventBroker()
+        stream = broker.stream()
+        self.assertEqual(await anext(stream), 'retry: 3000\n\n')
+        await asyncio.to_thread(broker.publish, 'stock', {'id': 1, 'name': 'Camisa', 'stock': 5})
+        self.assertEqual(await anext(stream), 'id: 1\nevent: stock\ndata: {"id": 1, "name": "Camisa", "stock": 5}\n\n')
+
+    async def test_slow_subscriber_is_resynced(self):
+        broker = EventBroker(queue_size=2)
+        stream = broker.stream()
+        await anext(stream)
+        for i in range(3):
+            broker.publish('stock', {'id': i})
+        await asyncio.sleep(0)
+        self.assertEqual(await anext(stream), 'event: resync\ndata: {}\n\n')
+        await stream.aclose()
+        self.assertFalse(broker.has_subscribers())
+
+class StockEventsTestCase(TestCase):
+    def test_stock_and_sale_events_after_commit(self):
+        product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=6, min_stock=5, price='10.00')
+        published = []
+        with mock.patch.object(events.broker, 'has_subscribers', return_value=True), \
+                mock.patch.object(events.broker, 'publish', side_effect=lambda event, data: published.append((event, data))):
+            with self.captureOnCommitCallbacks(execute=True):
+                InventoryExit.objects.create(product=product, quantity_sold=2)
+        self.assertIn(('stock', {'id': product.id, 'name': 'Camisa', 'stock': 4}), published)
+        self.assertIn(('low_stock', {'id': product.id, 'name': 'Camisa', 'quantity_needed': 1}), published)
+        sale = [data for event, data in published if event == 'sale'][0]
+        self.assertEqual(sale['quantity_sold'], 2)
+
+    def test_events_endpoint_requires_login(self):
+        self.assertEqual(self.client.get('/inventory_events/').status_code, 401)
+
+    def test_events_only_served_under_asgi(self):
+        user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/inventory_events/').status_code, 204)
+        self.assertNotContains(self.client.get('/inventory_consult/'), 'listenStockEvents();\n')
+        self.assertFalse(self.client.get('/inventory_consult/').context['live_events'])
+        self.assertFalse(events.broker.has_subscribers())
+
+class StockEventsASGITestCase(TransactionTestCase):
+    async def test_events_stream_under_asgi(self):
+        user = await sync_to_async(User.objects.create_user)(email='test@example.com', username='testuser', password='testpassword')
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get('/inventory_events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        #La suscripcion se crea al consumir el stream y se libera al cerrarlo
+        self.assertFalse(events.broker.has_subscribers())
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        self.assertTrue(events.broker.has_subscribers())
+        #Desconexion del cliente: el servidor ASGI cancela la tarea que espera el siguiente evento
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertFalse(events.broker.has_subscribers())
+        response = await self.async_client.get('/inventory_consult/')
+        self.assertTrue(response.context['live_events'])
+
+##Test para las vistas asincronas de lectura
+
+class AsyncReadViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=10, min_stock=5, price='10.00')
+        self.ticket = Ticket.objects.create(status='Abierto', type='Soporte', description='No puedo entrar')
+
+    def get(self, path, user, **extra):
+        request = self.factory.get(path, **extra)
+        async def auser():
+            return user
+        request.auser = auser
+        return request
+
+    async def test_product_stock(self):
+        response = await async_views.get_product_stock(self.get('/', AnonymousUser()), self.product.pk)
+        self.assertEqual(json.loads(response.content), {'stock': 10})
+        response = await async_views.get_product_stock(self.get('/', AnonymousUser()), self.product.pk + 1)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_ticket_details_requires_login(self):
+        response = await async_views.get_ticket_details(self.get('/', AnonymousUser()), self.ticket.pk)
+        self.assertEqual(response.status_code, 302)
+        response = await async_views.get_ticket_details(self.get('/', self.user), self.ticket.pk)
+        self.assertEqual(json.loads(response.content)['ticket']['type'], 'Soporte')
+        response = await async_views.get_ticket_details(self.get('/', self.user, headers={'If-None-Match': response['ETag']}), self.ticket.pk)
+        self.assertEqual(response.status_code, 304)
+        response = await async_views.get_ticket_details(self.get('/', self.user), self.ticket.pk + 1)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_inventory_consult_data_etag(self):
+        response = await async_views.inventory_consult_data(self.get('/', self.user))
+        self.assertEqual(json.loads(response.content)['inventory'][0]['stock'], 10)
+        response = await async_views.inventory_consult_data(self.get('/', self.user, headers={'If-None-Match': response['ETag']}))
+        self.assertEqual(response.status_code, 304)
+
+    async def test_ticket_search(self):
+        #La deteccion de la tabla FTS5 se hace en la primera busqueda, tambien desde la vista asincrona
+        tickets._ticket_fts.clear()
+        response = await async_views.get_tickets(self.get('/', self.user, data={'q': 'entrar'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([ticket['id'] for ticket in json.loads(response.content)['tickets']], [self.ticket.id])
+
+    async def test_product_stock_api_requires_credentials(self):
+        response = await async_views.product_stock_api(self.get('/', AnonymousUser()), self.product.pk)
+        self.assertEqual(response.status_code, 403)
+        response = await async_views.product_stock_api(self.get('/', self.user), self.product.pk)
+        self.assertEqual(json.loads(response.content), {'stock': 10})
+
+##Test para el numero de consultas por endpoint
+
+class QueryCountTestCase(TestCase):
+    def setUp(self):
+        admin_role = Role.objects.get_or_create(id=1, defaults={'name': 'Admin'})[0]
+        self.user = User.objects.create_user(email='admin@example.com', username='admin', password='testpassword', role=admin_role)
+        self.client.force_login(self.user)
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.add_rows()
+
+    def add_rows(self):
+        product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=10, min_stock=50, price='10.00')
+        InventoryEntry.objects.create(product=product, quantity_received=5)
+        InventoryExit.objects.create(product=product, quantity_sold=1)
+        Ticket.objects.create(status='Abierto', type='Soporte', description='No puedo entrar')
+        User.objects.create_user(email=f'user{product.pk}@example.com', username=f'user{product.pk}', password='testpassword')
+
+    #Mide las consultas con una fila de cada tipo y exige el mismo numero con varias mas
+    def assertConstantQueries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(client.get(url).status_code, 200)
+        for _ in range(5):
+            self.add_rows()
+        with self.assertNumQueries(len(context.captured_queries)):
+            self.assertEqual(client.get(url).status_code, 200)
+
+    def test_inventory_information(self):
+        self.assertConstantQueries(self.client, '/inventory_information/')
+
+    def test_inventory_information_dashboard(self):
+        self.assertConstantQueries(self.client, '/inventory_information_dashboard/')
+
+    def test_control_products(self):
+        self.assertConstantQueries(self.client, '/control_products/')
+
+    def test_user_administration(self):
+        self.assertConstantQueries(self.client, '/user-administration/')
+
+    def test_tickets(self):
+        self.assertConstantQueries(self.client, '/tickets/')
+
+    def test_inventory_forms(self):
+        self.assertConstantQueries(self.client, '/new_inventory/')
+
+    def test_api_lists(self):
+        for url in ['/api/inventory/entries/', '/api/inventory/exits/', '/api/inventory/insufficient/', '/api/users/']:
+            with self.subTest(url=url):
+                self.assertConstantQueries(self.api, url)
+
+##Test para los indices y el particionado del historial
+
+class LedgerIndexTestCase(TestCase):
+    def test_ledger_indexes_exist(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, InventoryExit._meta.db_table)
+        self.assertEqual(constraints['app_exit_product_date_idx']['columns'], ['product_id', 'date_sold'])
+        self.assertEqual(constraints['app_exit_date_idx']['columns'], ['date_sold'])
+
+    def test_partitioning_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command('partition_ledger')
+
+##Test para los reportes por rango de fechas
+
+class MovementReportTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Camisa', description='Una camisa elegante', stock=100, min_stock=5, price='10.00')
+
+    def test_daily_rows_follow_movements(self):
+        InventoryEntry.objects.create(product=self.product, quantity_received=10)
+        exit = InventoryExit.objects.create(product=self.product, quantity_sold=3)
+        InventoryExit.objects.create(product=self.product, quantity_sold=2)
+        exit.delete()
+        row = DailyStockMovement.objects.get(product=self.product)
+        self.assertEqual((row.day, row.quantity_received, row.quantity_sold), (exit.date_sold, 10, 2))
+
+    def test_month_buckets_from_daily_rows(self):
+        DailyStockMovement.objects.bulk_create([
+            DailyStockMovement(product=self.product, day=datetime.date(2026, 1, 5), quantity_received=10, quantity_sold=1),
+            DailyStockMovement(product=self.product, day=datetime.date(2026, 1, 20), quantity_sold=4),
+            DailyStockMovement(product=self.product, day=datetime.date(2026, 2, 1), quantity_sold=7),
+        ])
+        response = self.client.get('/api/reports/movements/', {'from': '2026-01-01', 'to': '2026-12-31', 'granularity': 'month'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['period'], row['quantity_received'], row['quantity_sold']) for row in response.data['results']],
+            [(datetime.date(2026, 1, 1), 10, 5), (datetime.date(2026, 2, 1), 0, 7)],
+        )
+        response = self.client.get('/api/reports/sales/', {'from': '2026-01-10', 'to': '2026-01-31'})
+        self.assertEqual([(row['period'], row['quantity_sold']) for row in response.data['results']], [(datetime.date(2026, 1, 20), 4)])
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/api/reports/sales/', {'from': '2026-02-01', 'to': '2026-01-01', 'granularity': 'hour'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('granularity', response.data)
+
+    def test_rebuild_matches_incremental_rows(self):
+        InventoryEntry.objects.create(product=self.product, quantity_received=10)
+        InventoryExit.objects.create(product=self.product, quantity_sold=3)
+        before = list(DailyStockMovement.objects.values_list('product_id', 'day', 'quantity_received', 'quantity_sold'))
+        DailyStockMovement.objects.all().delete()
+        self.assertEqual(rebuild_daily_movements(), 1)
+        self.assertEqual(list(DailyStockMovement.objects.values_list('product_id', 'day', 'quantity_received', 'quantity_sold')), before)
+
+##Test para la cache de usuarios
+
+#Fuera de TestCase: la cache solo se usa con las transacciones ya confirmadas
+class UserCacheTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear_local()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.client.force_login(self.user)
+
+    def test_session_requests_skip_user_query(self):
+        self.client.get('/dashboard/')
+        #request_started vacia connection.queries, por eso se cuentan con execute_wrapper
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            self.assertEqual(self.client.get('/dashboard/').status_code, 200)
+        self.assertTrue(queries)
+        self.assertFalse([sql for sql in queries if 'app_customuser' in sql])
+
+    def test_role_change_invalidates(self):
+        self.assertEqual(user_cache.get_user(self.user.pk).role_id, self.user.role_id)
+        admin_role = Role.objects.create(name='Admin prueba')
+        self.user.role = admin_role
+        self.user.save()
+        self.assertEqual(user_cache.get_user(self.user.pk).role_id, admin_role.id)
+        self.user.delete()
+        self.assertIsNone(user_cache.get_user(self.user.pk))
+
+    def test_returns_fresh_instances(self):
+        user = user_cache.get_user(self.user.pk)
+        user.username = 'otro'
+        self.assertEqual(user_cache.get_user(self.user.pk).username, 'testuser')
+
+    def test_caches_auth_fields_without_password(self):
+        user_cache.get_user(self.user.pk)
+        values = cache.get(user_cache.USER_KEY.format(self.user.pk, user_cache._user_version(self.user.pk, 300)))
+        self.assertNotIn('password', values)
+        user_cache.clear_local()
+        user = user_cache.get_user(self.user.pk)
+        self.assertNotIn('password', user.__dict__)
+        self.assertEqual(user.get_session_auth_hash(), User.objects.get(pk=self.user.pk).get_session_auth_hash())
+
+    #Una lectura carga la fila y, antes de guardarla en la cache, otro proceso cambia el rol
+    def test_read_interleaved_with_change(self):
+        admin_role = Role.objects.create(name='Admin prueba')
+        load_user = user_cache._load_user
+        def load_then_change(user_id):
+            user = load_user(user_id)
+            User.objects.filter(pk=user_id).update(role=admin_role)
+            user_cache.invalidate_user(user_id)
+            return user
+        with mock.patch.object(user_cache, '_load_user', load_then_change):
+            user_cache.get_user(self.user.pk)
+        user_cache.clear_local()
+        self.assertEqual(user_cache.get_user(self.user.pk).role_id, admin_role.id)
+
+    def test_token_version_read_interleaved_with_revocation(self):
+        load_token_version = user_cache._load_token_version
+        def load_then_revoke(user_id):
+            version = load_token_version(user_id)
+            User.objects.get(pk=user_id).revoke_tokens()
+            return version
+        cache.delete(user_cache.TOKEN_VERSION_KEY.format(self.user.pk))
+        with mock.patch.object(user_cache, '_load_token_version', load_then_revoke):
+            version = user_cache.token_version(self.user.pk)
+        self.assertEqual(user_cache.token_version(self.user.pk), version + 1)
+        self.user.delete()
+        self.assertIsNone(user_cache.token_version(self.user.pk))
+
+    @override_settings(USER_CACHE_SIZE=1)
+    def test_local_lru_is_bounded(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpassword')
+        user_cache.get_user(self.user.pk)
+        user_cache.get_user(other.pk)
+        self.assertEqual(list(user_cache._local), [other.pk])
+
+##Test para la autenticacion JWT sin consulta
+
+class StatelessJWTTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin_role = Role.objects.get_or_create(id=1, defaults={'name': 'Admin'})[0]
+        self.user = User.objects.create_user(email='admin@example.com', username='admin', password='testpassword', role=admin_role)
+        self.client = APIClient()
+        response = self.client.post('/api/login/', {'email': 'admin@example.com', 'password': 'testpassword'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_role_check_without_user_query(self):
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([sql for sql in queries if 'app_customuser' in sql and 'token_version' not in sql])
+
+    def test_role_change_revokes_tokens(self):
+        self.user.role = Role.default_role()
+        self.user.save()
+        response = self.client.get('/api/inventory/entries/')
+        self.assertEqual(response.data['code'], 'token_revoked')
+
+    def test_logout_revokes_tokens(self):
+        self.assertEqual(self.client.post('/api/logout/').status_code, 204)
+        for url in ['/api/inventory/entries/', '/api/profile/']:
+            self.assertEqual(self.client.get(url).data['code'], 'token_revoked')
 
+    def test_profile_uses_database_user(self):
+        response = self.client.get('/api/profile/')
+        self.assertEqual(response.data['email'], 'admin@example.com')
 
+##Test para el limite de intentos de login y el costo del hash
+
+@override_settings(LOGIN_THROTTLE_RATES={'ip': (100, 60), 'email': (2, 300)}, PASSWORD_HASH_ITERATIONS=1000)
+class LoginThrottleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.client = APIClient()
+
+    def login(self, password):
+        return self.client.post('/api/login/', {'email': 'test@example.com', 'password': password}, format='json')
+
+    def test_empty_bucket_rejects_before_hashing(self):
+        self.assertEqual(self.login('wrong').status_code, 400)
+        self.assertEqual(self.login('wrong').status_code, 400)
+        with mock.patch('app.serializers.authenticate') as authenticate:
+            response = self.login('testpassword')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        authenticate.assert_not_called()
+
+    def test_success_refills_email_bucket(self):
+        self.assertEqual(self.login('wrong').status_code, 400)
+        self.assertEqual(self.login('testpassword').status_code, 200)
+        self.assertEqual(self.login('wrong').status_code, 400)
+        self.assertEqual(self.login('wrong').status_code, 400)
+
+    def test_body_must_be_an_object(self):
+        for body in ['[1, 2]', '"test@example.com"', '3']:
+            response = self.client.post('/api/login/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'Invalid data. Expected a JSON object.'})
+
+    def test_login_view_throttled(self):
+        for _ in range(2):
+            self.client.post('/login/', {'email': 'test@example.com', 'password': 'wrong'})
+        self.assertEqual(self.client.post('/login/', {'email': 'test@example.com', 'password': 'wrong'}).status_code, 429)
+
+    def test_attempt_takes_token_before_authenticating(self):
+        #Dos intentos en curso a la vez ya agotan la cubeta del correo antes de fallar
+        request = RequestFactory().post('/api/login/', REMOTE_ADDR='192.0.2.1')
+        self.assertEqual(throttling.take_attempt(request, 'test@example.com'), 0)
+        self.assertEqual(throttling.take_attempt(request, 'test@example.com'), 0)
+        self.assertTrue(throttling.take_attempt(request, 'test@example.com') > 0)
+        self.assertEqual(throttling.take_attempt(request, 'otro@example.com'), 0)
+
+    def test_success_refunds_ip_token(self):
+        with override_settings(LOGIN_THROTTLE_RATES={'ip': (2, 60), 'email': (5, 300)}):
+            for _ in range(3):
+                self.assertEqual(self.login('testpassword').status_code, 200)
+            self.assertEqual(self.login('wrong').status_code, 400)
+            self.assertEqual(self.login('wrong').status_code, 400)
+            self.assertEqual(self.login('testpassword').status_code, 429)
+
+    def test_client_ip(self):
+        factory = RequestFactory()
+        request = factory.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='203.0.113.9, 198.51.100.7, 10.0.0.1', HTTP_X_REAL_IP='198.51.100.7')
+        self.assertEqual(throttling.client_ip(request), '10.0.0.2')
+        with override_settings(LOGIN_THROTTLE_TRUSTED_PROXIES=2):
+            self.assertEqual(throttling.client_ip(request), '198.51.100.7')
+        with override_settings(LOGIN_THROTTLE_TRUSTED_PROXIES=4):
+            self.assertEqual(throttling.client_ip(request), '10.0.0.2')
+        with override_settings(LOGIN_THROTTLE_IP_HEADER='HTTP_X_REAL_IP'):
+            self.assertEqual(throttling.client_ip(request), '198.51.100.7')
+        with override_settings(LOGIN_THROTTLE_IP_HEADER='HTTP_X_FORWARDED_FOR'):
+            self.assertEqual(throttling.client_ip(request), '10.0.0.2')
+
+    def test_rehash_with_new_cost_keeps_tokens(self):
+        version = self.user.token_version
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self.login('testpassword').status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertEqual(self.user.token_version, version)
+
+##Test para el listado y la busqueda de tickets
+
+class TicketListTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.client.force_login(self.user)
+        self.first = Ticket.objects.create(status='Pendiente', type='Soporte', description='No puedo entrar a mi cuenta')
+        self.second = Ticket.objects.create(status='Cerrado', type='Errores', description='La pagina de inventario falla')
+        self.third = Ticket.objects.create(status='Pendiente', type='Cuenta', description='Cambiar el correo de la cuenta')
+
+    def test_filters(self):
+        tickets = self.client.get('/tickets/', {'status': 'Pendiente'}).json()['tickets']
+        self.assertEqual([ticket['id'] for ticket in tickets], [self.third.pk, self.first.pk])
+        tickets = self.client.get('/tickets/', {'type': 'Errores'}).json()['tickets']
+        self.assertEqual([ticket['id'] for ticket in tickets], [self.second.pk])
+        today = timezone.localdate().isoformat()
+        self.assertEqual(len(self.client.get('/tickets/', {'created_from': today, 'created_to': today}).json()['tickets']), 3)
+        self.assertEqual(self.client.get('/tickets/', {'type': 'Otro'}).status_code, 400)
+        self.assertEqual(self.client.get('/tickets/', {'created_from': 'ayer'}).status_code, 400)
+
+    def test_keyset_pages(self):
+        page = self.client.get('/tickets/', {'page_size': 2}).json()
+        self.assertEqual([ticket['id'] for ticket in page['tickets']], [self.third.pk, self.second.pk])
+        page = self.client.get('/tickets/', {'page_size': 2, 'cursor': page['next']}).json()
+        self.assertEqual([ticket['id'] for ticket in page['tickets']], [self.first.pk])
+        self.assertIsNone(page['next'])
+        self.assertEqual(self.client.get('/tickets/', {'cursor': 'x'}).status_code, 400)
+
+    def test_full_text_search(self):
+        tickets = self.client.get('/tickets/', {'q': 'cuenta'}).json()['tickets']
+        self.assertEqual({ticket['id'] for ticket in tickets}, {self.first.pk, self.third.pk})
+        self.second.description = 'Tampoco puedo ver mi cuenta'
+        self.second.save()
+        tickets = self.client.get('/tickets/', {'q': 'cuenta', 'status': 'Cerrado'}).json()['tickets']
+        self.assertEqual([ticket['id'] for ticket in tickets], [self.second.pk])
+        self.assertEqual(self.client.get('/tickets/', {'q': '"cuenta OR'}).status_code, 200)
+
+    def test_ticket_details_etag(self):
+        response = self.client.get(f'/tickets/{self.first.pk}/')
+        response = self.client.get(f'/tickets/{self.first.pk}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.first.status = 'Cerrado'
+        self.first.save()
+        response = self.client.get(f'/tickets/{self.first.pk}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.json()['ticket']['status'], 'Cerrado')
+
+##Test para las metricas por vista
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.client.force_login(self.user)
+        Ticket.objects.create(status='Pendiente', type='Soporte', description='No puedo entrar')
+
+    def test_server_timing_and_metrics(self):
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=True):
+            response = self.client.get('/tickets/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="[1-9]\d* queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(REQUEST_METRICS_ALLOWED_IPS=['127.0.0.1']):
+            body = self.client.get('/metrics').content.decode()
+        self.assertIn('inventory_request_duration_seconds_count{view="get_tickets",method="GET"} 1', body)
+        self.assertIn('inventory_responses_total{view="get_tickets",method="GET",status="200"} 1', body)
+        self.assertIn('inventory_stock_cache_requests_total{cache="product",outcome="hits"}', body)
+
+    def test_api_render_time(self):
+        APIClient().get('/api/inventory/exits/')
+        admin_role = Role.objects.get_or_create(id=1, defaults={'name': 'Admin'})[0]
+        self.client.force_login(User.objects.create_user(email='admin@example.com', username='admin', password='testpassword', role=admin_role))
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('inventory_request_render_seconds_count{view="inventory-exit-list",method="GET"} 1', body)
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False)
+    def test_server_timing_only_for_admins(self):
+        self.assertNotIn('Server-Timing', self.client.get('/tickets/'))
+        admin_role = Role.objects.get_or_create(id=1, defaults={'name': 'Admin'})[0]
+        self.client.force_login(User.objects.create_user(email='admin@example.com', username='admin', password='testpassword', role=admin_role))
+        self.assertIn('Server-Timing', self.client.get('/tickets/'))
+
+    def test_unknown_method_label(self):
+        self.client.generic('BREW', '/tickets/')
+        self.client.generic('BREW2', '/tickets/')
+        with override_settings(REQUEST_METRICS_ALLOWED_IPS=['127.0.0.1']):
+            body = self.client.get('/metrics').content.decode()
+        self.assertIn('inventory_request_duration_seconds_count{view="get_tickets",method="other"} 2', body)
+        self.assertNotIn('BREW', body)
+
+    @override_settings(REQUEST_METRICS_SLOW_SECONDS=0)
+    def test_slow_request_logs_sql(self):
+        with self.assertLogs('app.metrics', 'WARNING') as logs:
+            self.client.get('/tickets/')
+        self.assertIn('get_tickets', logs.output[0])
+        self.assertIn('app_ticket', logs.output[0])
+
+##Test para el selector de productos con busqueda
+
+class ProductPickerTestCase(TestCase):
+    def setUp(self):
+        admin_role = Role.objects.get_or_create(id=1, defaults={'name': 'Admin'})[0]
+        self.user = User.objects.create_user(email='admin@example.com', username='admin', password='testpassword', role=admin_role)
+        self.client.force_login(self.user)
+        self.shirt = Product.objects.create(name='Camisa', description='Una camisa', stock=10, min_stock=5, price='10.00')
+        self.tshirt = Product.objects.create(name='Camiseta', description='Una camiseta', stock=4, min_stock=5, price='8.00')
+        self.pants = Product.objects.create(name='Pantalon camisero', description='Un pantalon', stock=7, min_stock=5, price='20.00')
+        Product.objects.create(name='Blusa', description='Una blusa', stock=3, min_stock=5, price='15.00')
+
+    def test_search_prefix_first(self):
+        response = self.client.get('/api/products/search/', {'q': 'cami'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.shirt.id, self.tshirt.id, self.pants.id])
+        response = self.client.get('/api/products/search/', {'q': 'cami', 'limit': 1})
+        self.assertEqual(response.json()['results'], [{'id': self.shirt.id, 'name': 'Camisa', 'stock': 10}])
+        self.assertEqual(self.client.get('/api/products/search/', {'q': ''}).json()['results'], [])
+        self.assertEqual(self.client.get('/api/products/search/', {'q': 'cami', 'limit': 'x'}).status_code, 400)
+
+    def test_forms_render_only_selected_product(self):
+        for url in ['/new_inventory/', '/sales/']:
+            with self.subTest(url=url):
+                content = self.client.get(url).content.decode()
+                self.assertNotIn('<option', content)
+                self.assertIn('data-product-search="/api/products/search/"', content)
+                self.assertIn('app/product_search.js', content)
+        content = self.client.post('/sales/', {'product': self.tshirt.id, 'quantity_sold': 50}).content.decode()
+        self.assertEqual(content.count('<option'), 1)
+        self.assertIn(f'<option value="{self.tshirt.id}" selected>Camiseta</option>', content)
+
+    def test_submit_selected_product(self):
+        self.client.post('/new_inventory/', {'product': self.pants.id, 'quantity_received': 3})
+        self.pants.refresh_from_db()
+        self.assertEqual(self.pants.stock, 10)
+
+##Test para el escaneo por SKU
+
+#Fuera de TestCase: el indice en memoria solo se usa con las transacciones ya confirmadas
+class SkuScanTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        sku_index.invalidate_index()
+        self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Camisa', description='Una camisa', stock=10, min_stock=5, price='10.00', sku='7501234567890')
+
+    def test_warm_lookup_skips_database(self):
+        self.assertEqual(sku_index.lookup('7501234567890'), self.product.id)
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            self.assertEqual(sku_index.lookup(' 7501234567890 '), self.product.id)
+        self.assertEqual(queries, [])
+        #Un codigo que no esta en el indice se busca en la base
+        with self.assertNumQueries(1):
+            self.assertIsNone(sku_index.lookup('0000'))
+
+    def test_miss_falls_back_to_database(self):
+        self.assertEqual(sku_index.lookup('7501234567890'), self.product.id)
+        #Producto creado por otro proceso: esta cache no vio la invalidacion
+        with mock.patch.object(sku_index, 'invalidate_index'):
+            other = Product.objects.create(name='Pantalon', description='Un pantalon', stock=1, min_stock=1, price='1.00', sku='7500000000001')
+        self.assertEqual(sku_index.lookup('7500000000001'), other.id)
+
+    def test_only_sku_changes_reload_index(self):
+        self.assertEqual(sku_index.lookup('7501234567890'), self.product.id)
+        version = cache.get(sku_index.VERSION_KEY)
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock = 3
+        product.save()
+        Product.objects.create(name='Sin codigo', description='Sin codigo', stock=1, min_stock=1, price='1.00')
+        self.assertEqual(cache.get(sku_index.VERSION_KEY), version)
+        product.sku = '7509999999999'
+        product.save()
+        self.assertNotEqual(cache.get(sku_index.VERSION_KEY), version)
+
+    def test_catalog_import_invalidates(self):
+        self.assertEqual(sku_index.lookup('7501234567890'), self.product.id)
+        version = cache.get(sku_index.VERSION_KEY)
+        import_products(['name,description,stock,min_stock,price,sku', 'Gorra,Una gorra,3,1,5.00,7500000000002'])
+        self.assertNotEqual(cache.get(sku_index.VERSION_KEY), version)
+        self.assertEqual(sku_index.lookup('7500000000002'), Product.objects.get(name='Gorra').id)
+
+    def test_sku_change_invalidates(self):
+        self.assertEqual(sku_index.lookup('7501234567890'), self.product.id)
+        self.product.sku = '7509999999999'
+        self.product.save()
+        self.assertIsNone(sku_index.lookup('7501234567890'))
+        self.assertEqual(sku_index.lookup('7509999999999'), self.product.id)
+        self.product.delete()
+        self.assertIsNone(sku_index.lookup('7509999999999'))
+
+    def test_scan_sale_and_entry(self):
+        response = self.client.post('/api/scan/', {'code': '7501234567890'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['stock'], 9)
+        self.assertEqual(InventoryExit.objects.get(pk=response.data['movement']).quantity_sold, 1)
+        response = self.client.post('/api/scan/', {'code': '7501234567890', 'action': 'entry', 'quantity': 5}, format='json')
+        self.assertEqual(response.data['stock'], 14)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 14)
+
+    def test_scan_errors(self):
+        self.assertEqual(self.client.post('/api/scan/', {'code': '0000'}, format='json').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post('/api/scan/', {'code': '7501234567890', 'quantity': 0}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(InventoryExit.objects.exists())
+        with self.assertRaises(IntegrityError):
+            Product.objects.create(name='Otra', description='Otra', stock=1, min_stock=1, price='1.00', sku='7501234567890')
+
+##Test para la paginacion de productos y usuarios
+
+class AdminListingTestCase(TestCase):
+    def setUp(self):
+        admin_role = Role.objects.get_or_create(id=1, defaults={'name': 'Admin'})[0]
+        self.sales_role = Role.objects.create(name='Ventas prueba')
+        self.user = User.objects.create_user(email='admin@example.com', username='admin', password='testpassword', role=admin_role)
+        self.client.force_login(self.user)
+        Product.objects.bulk_create([
+            Product(name=f'Producto {i:03d}', description='Producto', stock=i % 10, min_stock=5, price=i) for i in range(120)
+        ])
+
+    def test_products_paginated_and_filtered(self):
+        response = self.client.get('/control_products/')
+        page = response.context['page']
+        self.assertEqual(len(page.object_list), 50)
+        self.assertEqual(page.paginator.count, 120)
+        self.assertEqual(page.object_list[0].name, 'Producto 000')
+        response = self.client.get('/control_products/', {'q': 'producto 11', 'sort': '-price', 'page_size': 25})
+        self.assertEqual([product.name for product in response.context['page']], [f'Producto 11{i}' for i in range(9, -1, -1)])
+        response = self.client.get('/control_products/', {'low_stock': '1', 'page': 2, 'page_size': 25})
+        page = response.context['page']
+        self.assertEqual(page.paginator.count, 60)
+        self.assertTrue(all(product.stock < product.min_stock for product in page))
+        self.assertIn('low_stock=1&amp;page_size=25&amp;page=3', response.content.decode())
+
+    def test_products_invalid_params_use_defaults(self):
+        response = self.client.get('/control_products/', {'sort': 'description', 'page_size': 100000, 'page': 'x'})
+        self.assertEqual(response.context['filters']['sort'], 'name')
+        self.assertEqual(response.context['page'].number, 1)
+        self.assertEqual(len(response.context['page'].object_list), 50)
+
+    def test_users_filtered_by_role(self):
+        for i in range(3):
+            User.objects.create_user(email=f'ventas{i}@example.com', username=f'ventas{i}', password='testpassword', role=self.sales_role)
+        response = self.client.get('/user-administration/', {'role': self.sales_role.id, 'sort': '-username'})
+        self.assertEqual([user.username for user in response.context['page']], ['ventas2', 'ventas1', 'ventas0'])
+        response = self.client.get('/user-administration/', {'q': 'admin@'})
+        self.assertEqual([user.username for user in response.context['page']], ['admin'])
+        response = self.client.post(f'/user-administration/?role={self.sales_role.id}', {'delete_user': '', 'user_id': User.objects.get(username='ventas0').id})
+        self.assertRedirects(response, f'/user-administration/?role={self.sales_role.id}', fetch_redirect_response=False)
+
+##Test para la serializacion JSON rapida
+
+class FastJsonTestCase(SimpleTestCase):
+    data = {
+        'price': Decimal('10.50'),
+        'day': datetime.date(2024, 5, 1),
+        'at': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        'name': 'Camisa\u2028',
+        1: [1, 2],
+    }
+
+    def assertRendered(self):
+        response = FastJsonResponse(self.data)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {
+            'price': '10.50', 'day': '2024-05-01', 'at': '2024-05-01T12:30:00Z', 'name': 'Camisa\u2028', '1': [1, 2],
+        })
+        content = FastJSONRenderer().render({'price': Decimal('10.50'), 'name': 'Camisa\u2028'}, 'application/json')
+        self.assertEqual(json.loads(content), {'price': 10.5, 'name': 'Camisa\u2028'})
+        self.assertIn(b'\\u2028', content)
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
+
+    def test_orjson(self):
+        self.assertIsNotNone(renderers.orjson)
+        self.assertRendered()
+
+    @mock.patch('app.renderers.orjson', None)
+    def test_stdlib_fallback(self):
+        self.assertRendered()
+
+    def test_same_output_as_json_response(self):
+        data = {
+            'at': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'local': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456),
+            'time': datetime.time(12, 30, 15, 123456),
+            'day': datetime.date(2024, 5, 1),
+            'price': Decimal('10.50'),
+            'code': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        }
+        self.assertEqual(json.loads(FastJsonResponse(data).content), json.loads(JsonResponse(data).content))
+        self.assertEqual(json.loads(FastJsonResponse(data).content)['time'], '12:30:15.123')
 
+    def test_indented_uses_drf_renderer(self):
+        content = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(content, b'{\n  "a": 1\n}')
@@ -0,0 +1,85 @@
+import hashlib
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+BUCKET_KEY = 'login:bucket:{}:{}:{}'
+DEFAULT_RATES = {'ip': (30, 60), 'email': (5, 300)}
+
+
+#Limite de intentos de login en la cache: una cubeta por IP y otra por correo, con `attempts`
+#fichas por ventana de `period` segundos. Cada intento toma su ficha antes de calcular el hash
+#(cache.add + cache.decr, atomicos tambien entre procesos), asi los intentos concurrentes no
+#pueden pasar todos con la misma lectura; un login correcto la devuelve
+def _key(kind, ident, window):
+    return BUCKET_KEY.format(kind, hashlib.sha256(ident.encode()).hexdigest(), window)
+
+def _rates():
+    return getattr(settings, 'LOGIN_THROTTLE_RATES', DEFAULT_RATES)
+
+#IP del cliente. Detras de proxies, X-Forwarded-For se lee LOGIN_THROTTLE_TRUSTED_PROXIES
+#entradas desde la derecha: las de la izquierda las escribe el cliente. LOGIN_THROTTLE_IP_HEADER
+#es para una cabecera de un solo valor que el proxy reemplaza (X-Real-IP)
+def client_ip(request):
+    proxies = getattr(settings, 'LOGIN_THROTTLE_TRUSTED_PROXIES', 0)
+    if proxies:
+        forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        if len(forwarded) >= proxies and forwarded[-proxies]:
+            return forwarded[-proxies]
+        return request.META.get('REMOTE_ADDR', '')
+    header = getattr(settings, 'LOGIN_THROTTLE_IP_HEADER', None)
+    value = request.META.get(header, '').strip() if header else ''
+    if value and ',' not in value:
+        return value
+    return request.META.get('REMOTE_ADDR', '')
+
+def _buckets(request, email):
+    buckets = [('ip', client_ip(request))]
+    if isinstance(email, str) and email:
+        buckets.append(('email', email.strip().lower()))
+    return buckets
+
+def _take(key, attempts, period):
+    if cache.add(key, attempts - 1, period):
+        return attempts - 1
+    try:
+        return cache.decr(key)
+    except ValueError:
+        #La clave expiro entre add y decr
+        cache.add(key, attempts - 1, period)
+        return attempts - 1
+
+def _refund(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+#Toma una ficha de cada cubeta. Devuelve los segundos hasta el proximo intento permitido, o 0
+#si se puede intentar; si alguna cubeta esta vacia se devuelven todas las fichas tomadas
+def take_attempt(request, email):
+    now = time.time()
+    taken = []
+    wait = 0
+    for kind, ident in _buckets(request, email):
+        attempts, period = _rates()[kind]
+        key = _key(kind, ident, int(now // period))
+        taken.append(key)
+        if _take(key, attempts, period) < 0:
+            wait = max(wait, math.ceil(period - now % period))
+    if wait:
+        for key in taken:
+            _refund(key)
+    return wait
+
+#Un login correcto devuelve la ficha de la IP y vacia la cubeta del correo
+def login_succeeded(request, email):
+    now = time.time()
+    for kind, ident in _buckets(request, email):
+        period = _rates()[kind][1]
+        key = _key(kind, ident, int(now // period))
+        if kind == 'ip':
+            _refund(key)
+        else:
+            cache.delete(key)
@@ -0,0 +1,107 @@
+import base64
+import datetime
+import json
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Ticket
+
+TICKET_FIELDS = ['id', 'type', 'description', 'status', 'created_at']
+TICKET_FTS_TABLE = 'app_ticket_fts'
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+#Si la base tiene la tabla FTS5, por alias de conexion; se consulta en la primera busqueda
+_ticket_fts = {}
+
+
+#Listado de tickets con filtros, busqueda y paginacion por llave (created_at, id): cada pagina
+#continua donde termino la anterior usando el indice en lugar de OFFSET
+def ticket_query(params):
+    tickets = Ticket.objects.order_by('-created_at', '-id')
+    if params.get('status'):
+        tickets = tickets.filter(status=params['status'])
+    if params.get('type'):
+        if params['type'] not in dict(Ticket.TYPE_CHOICES):
+            raise ValueError('Tipo de ticket invalido')
+        tickets = tickets.filter(type=params['type'])
+    created_from = _parse_day(params, 'created_from')
+    if created_from is not None:
+        tickets = tickets.filter(created_at__gte=_start_of_day(created_from))
+    created_to = _parse_day(params, 'created_to')
+    if created_to is not None:
+        tickets = tickets.filter(created_at__lt=_start_of_day(created_to + datetime.timedelta(days=1)))
+    if params.get('q'):
+        tickets = search_tickets(tickets, params['q'])
+    if params.get('cursor'):
+        created_at, ticket_id = _decode_cursor(params['cursor'])
+        tickets = tickets.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=ticket_id))
+    try:
+        page_size = min(int(params.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('page_size debe ser un numero entero')
+    if page_size < 1:
+        raise ValueError('page_size debe ser mayor que cero')
+    return tickets.values(*TICKET_FIELDS)[:page_size + 1], page_size
+
+#Recorta la fila extra pedida para saber si hay otra pagina y arma su cursor
+def ticket_page(rows, page_size):
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(rows[-1])
+    return {'tickets': rows, 'next': next_cursor}
+
+#Busqueda de texto completo en la descripcion: columna tsvector con indice GIN en PostgreSQL,
+#tabla FTS5 en SQLite (ver la migracion 0011) y icontains en cualquier otra base
+def search_tickets(tickets, text):
+    if connection.vendor == 'postgresql':
+        return tickets.filter(RawSQL(
+            f"{Ticket._meta.db_table}.search_vector @@ websearch_to_tsquery('spanish', %s)", [text], output_field=BooleanField(),
+        ))
+    if connection.vendor == 'sqlite' and _has_ticket_fts():
+        #Cada palabra se pasa entre comillas para que FTS5 no la interprete como operador
+        terms = ' '.join('"' + term.replace('"', '""') + '"' for term in text.split())
+        if not terms:
+            return tickets
+        return tickets.filter(id__in=RawSQL(f"SELECT rowid FROM {TICKET_FTS_TABLE} WHERE {TICKET_FTS_TABLE} MATCH %s", [terms]))
+    return tickets.filter(description__icontains=text)
+
+#La tabla solo cambia con las migraciones: se busca una vez por proceso y no en cada consulta
+def _has_ticket_fts():
+    has_fts = _ticket_fts.get(connection.alias)
+    if has_fts is None:
+        has_fts = _ticket_fts[connection.alias] = TICKET_FTS_TABLE in connection.introspection.table_names()
+    return has_fts
+
+def _parse_day(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f'{name} debe tener el formato AAAA-MM-DD')
+    return day
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+def _encode_cursor(row):
+    data = json.dumps([row['created_at'].isoformat(), row['id']])
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        created_at, ticket_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError
+        return created_at, int(ticket_id)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor invalido')
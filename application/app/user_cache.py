@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection
+from .models import CustomUser
+
+USER_VERSION_KEY = 'auth:user:version:{}'
+USER_KEY = 'auth:user:{}:{}'
+TOKEN_VERSION_KEY = 'auth:token_version:{}'
+#Campos que se guardan del usuario: los de la autenticacion y los permisos. La contraseña no se
+#guarda; en su lugar va el hash de sesion ya calculado. El resto de campos queda diferido
+AUTH_FIELDS = ('id', 'email', 'username', 'role_id', 'is_active', 'is_staff', 'token_version', 'last_login')
+
+_lock = threading.Lock()
+_local = OrderedDict()
+
+
+#Cache de dos niveles para el usuario de la sesion: un LRU en memoria de este proceso con un TTL
+#corto y la cache compartida con un TTL mayor. Se guardan los valores de las columnas y en cada
+#peticion se arma una instancia nueva, asi una vista que modifica request.user no altera la cache.
+#La clave compartida lleva una version por usuario que sube en el commit de cada cambio: una
+#lectura que cargo la fila antes del cambio la guarda con cache.add bajo la version vieja
+def _settings():
+    return (
+        getattr(settings, 'USER_CACHE_TIMEOUT', 300),
+        getattr(settings, 'USER_CACHE_LOCAL_TIMEOUT', 5),
+        getattr(settings, 'USER_CACHE_SIZE', 1024),
+    )
+
+def _field_names():
+    return [field.attname for field in CustomUser._meta.concrete_fields if field.attname in AUTH_FIELDS]
+
+def _values(user):
+    values = {name: getattr(user, name) for name in _field_names()}
+    values['session_auth_hash'] = user.get_session_auth_hash()
+    return values
+
+def _build(values):
+    field_names = _field_names()
+    #Valores guardados con otra version del modelo (p. ej. antes de una migracion) no se usan
+    if values is None or list(values) != [*field_names, 'session_auth_hash']:
+        return None
+    user = CustomUser.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
+    user._session_auth_hash = values['session_auth_hash']
+    return user
+
+#Si la version se pierde (expulsion o reinicio de la cache) se reinicia con la hora actual
+#para no reutilizar una clave vieja
+def _new_version():
+    return time.time_ns() // 1000
+
+def _user_version(user_id, timeout):
+    key = USER_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout)
+        version = cache.get(key)
+    return version
+
+def _load_user(user_id):
+    return CustomUser.objects.filter(pk=user_id).first()
+
+def _local_get(user_id, now):
+    with _lock:
+        item = _local.get(user_id)
+        if item is None:
+            return None
+        expires, values = item
+        if expires < now:
+            del _local[user_id]
+            return None
+        _local.move_to_end(user_id)
+        return values
+
+def _local_set(user_id, values, now, local_timeout, size):
+    with _lock:
+        _local[user_id] = (now + local_timeout, values)
+        _local.move_to_end(user_id)
+        while len(_local) > size:
+            _local.popitem(last=False)
+
+def get_user(user_id):
+    timeout, local_timeout, size = _settings()
+    #Dentro de una transaccion se lee de la base: la fila puede no estar confirmada todavia
+    if not timeout or connection.in_atomic_block:
+        return _load_user(user_id)
+    now = time.monotonic()
+    user = _build(_local_get(user_id, now))
+    if user is not None:
+        return user
+    key = USER_KEY.format(user_id, _user_version(user_id, timeout))
+    values = cache.get(key)
+    user = _build(values)
+    if user is None:
+        user = _load_user(user_id)
+        if user is None:
+            return None
+        values = _values(user)
+        cache.add(key, values, timeout)
+    _local_set(user_id, values, now, local_timeout, size)
+    return user
+
+def _load_token_version(user_id):
+    return CustomUser.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+
+#Version vigente de los tokens JWT del usuario (None si no existe), leida de la cache compartida
+#para que la revocacion se vea en todos los procesos sin consultar la base en cada peticion.
+#La lectura solo agrega (cache.add): el valor nuevo lo escribe set_token_version en el commit,
+#asi una lectura que cargo la version anterior no puede pisar una revocacion
+def token_version(user_id):
+    timeout = _settings()[0]
+    if not timeout or connection.in_atomic_block:
+        return _load_token_version(user_id)
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _load_token_version(user_id)
+        if version is not None:
+            cache.add(key, version, timeout)
+    return version
+
+#Se llama en el commit de cada escritura de token_version. Un usuario borrado se guarda como
+#None: la clave existe y ninguna lectura atrasada puede agregar su version anterior
+def set_token_version(user_id, version):
+    timeout = _settings()[0]
+    if timeout:
+        cache.set(TOKEN_VERSION_KEY.format(user_id), version, timeout)
+
+#Los demas procesos pueden servir su copia local hasta USER_CACHE_LOCAL_TIMEOUT segundos
+def invalidate_user(user_id):
+    with _lock:
+        _local.pop(user_id, None)
+    try:
+        cache.incr(USER_VERSION_KEY.format(user_id))
+    except ValueError:
+        cache.add(USER_VERSION_KEY.format(user_id), _new_version(), _settings()[0])
+
+def clear_local():
+    with _lock:
+        _local.clear()
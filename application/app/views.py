@@ -1,18 +1,37 @@
+import codecs
 from rest_framework import status
 from django.contrib import messages
 from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
-from django.http import Http404, JsonResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.db.models import F
 from rest_framework.decorators import api_view
 from django.contrib.auth import authenticate, login
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, render, redirect
-from .models import CustomUser, InsufficientStock, InventoryEntry, InventoryExit, Ticket, Product
+from .models import CustomUser, InventoryEntry, InventoryExit, Ticket, Product
 from .form import CustomUserCreationForm, CustomUserForm, InventoryEntryForm, InventoryExitForm, UserStatusForm, UserEditForm, ProductForm, StockForm
-from app.serializers import CustomUserSerializer, InsufficientStockSerializer, InventoryEntrySerializer, InventoryExitSerializer, LoginSerializer, ProductSerializer
+from . import events, sku_index, stock_cache, throttling
+from .sales import product_sales
+from .revisions import INVENTORY_ETAG, inventory_etag, product_etag, ticket_etag
+from .tickets import ticket_page, ticket_query
+from .pagination import CursorListMixin
+from .listing import product_listing, user_listing
+from .parsers import CSVParser, NDJSONParser
+from .renderers import FastJsonResponse
+from .bulk import ingest_entries, ingest_exits, record_movement
+from .catalog import MAX_SEARCH_LIMIT, SEARCH_LIMIT, export_products, import_products, search_products
+from .authentication import DatabaseJWTAuthentication, InventoryRefreshToken
+from .reports import movement_report, sales_report
+from app.serializers import CustomUserSerializer, InsufficientStockSerializer, InventoryEntrySerializer, InventoryExitSerializer, LoginSerializer, ProductSerializer, ReportQuerySerializer, ScanSerializer, StockBatchSerializer
 
 @login_required 
 def create_ticket(request):
@@ -22,24 +41,28 @@ def create_ticket(request):
             description = request.POST.get('description')
             status = 'Pendiente'
             ticket = Ticket.objects.create(type=type, description=description, status=status)
-            return JsonResponse({'message': 'Ticket creado correctamente'}, status=201)
+            return FastJsonResponse({'message': 'Ticket creado correctamente'}, status=201)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=400)
+            return FastJsonResponse({'error': str(e)}, status=400)
     else:
-        return JsonResponse({'error': 'Método no permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método no permitido'}, status=405)
 @login_required 
 def get_tickets(request):
     if request.method == 'GET':
-        tickets = Ticket.objects.all().values()
-        return JsonResponse({'tickets': list(tickets)})
+        try:
+            tickets, page_size = ticket_query(request.GET)
+            return FastJsonResponse(ticket_page(tickets, page_size))
+        except ValueError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
     else:
-        return JsonResponse({'error': 'Método no permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método no permitido'}, status=405)
 @login_required 
+@condition(etag_func=ticket_etag)
 def get_ticket_details(request, ticket_id):
     if request.method == 'GET':
         try:
             ticket = Ticket.objects.get(id=ticket_id)
-            return JsonResponse({'ticket': {
+            return FastJsonResponse({'ticket': {
                 'id': ticket.id,
                 'type': ticket.type,
                 'description': ticket.description,
@@ -47,9 +70,9 @@ def get_ticket_details(request, ticket_id):
                 'created_at': ticket.created_at.strftime("%Y-%m-%d %H:%M:%S")
             }})
         except Ticket.DoesNotExist:
-            return JsonResponse({'error': 'Ticket no encontrado'}, status=404)
+            return FastJsonResponse({'error': 'Ticket no encontrado'}, status=404)
     else:
-        return JsonResponse({'error': 'Método no permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método no permitido'}, status=405)
     
 ##MODELOS DE VISTAS DENTRO DE DJANGO
 
@@ -57,8 +80,12 @@ def login_view(request):
     if request.method == 'POST':
         email = request.POST.get('email')
         password = request.POST.get('password')
+        wait = throttling.take_attempt(request, email)
+        if wait:
+            return render(request, 'login.html', {'error': f'Demasiados intentos fallidos, intente de nuevo en {wait} segundos'}, status=429)
         user = authenticate(request, email=email, password=password)
         if user is not None:
+            throttling.login_succeeded(request, email)
             login(request, user)
             return redirect('dashboard')  
         else:
@@ -83,11 +110,12 @@ def register_view(request):
 def dashboard_view(request):
     user = request.user
     user_type = user.role_id
-    return render(request, 'dashboard.html', {'role_id': user_type})
+    return render(request, 'dashboard.html', {'role_id': user_type, 'live_events': events.live_events_available(request)})
 
 @login_required
 def profile_view(request):
-    user = request.user
+    #El usuario de la sesion viene de la cache sin todos sus campos; el formulario usa la fila completa
+    user = get_object_or_404(CustomUser, pk=request.user.pk)
     if request.method == 'POST':
         form = CustomUserForm(request.POST, instance=user)
         if form.is_valid():
@@ -103,7 +131,6 @@ def user_administration(request):
     if request.user.role_id != 1:
         return redirect('dashboard')  
 
-    users = CustomUser.objects.all()
     form_status = UserStatusForm()
     form_edit = UserEditForm()
     
@@ -116,7 +143,7 @@ def user_administration(request):
                 user = CustomUser.objects.get(id=user_id)
                 user.usertype = new_status
                 user.save()
-                return redirect('user_administration')
+                return redirect(request.get_full_path())
 
         elif 'edit_user' in request.POST:
             form_edit = UserEditForm(request.POST)
@@ -130,15 +157,15 @@ def user_administration(request):
                 user.email = new_email
                 user.role_id = new_role
                 user.save()
-                return redirect('user_administration')
+                return redirect(request.get_full_path())
 
         elif 'delete_user' in request.POST:
             user_id = request.POST.get('user_id')
             user = get_object_or_404(CustomUser, id=user_id)
             user.delete()
-            return redirect('user_administration')
+            return redirect(request.get_full_path())
             
-    return render(request, 'user_administration.html', {'users': users, 'form_status': form_status, 'form_edit': form_edit})
+    return render(request, 'user_administration.html', {**user_listing(request), 'form_status': form_status, 'form_edit': form_edit})
 
 @login_required  
 def control_products(request):
@@ -166,8 +193,7 @@ def control_products(request):
                 messages.success(request, '¡El producto se añadio exitosamente!')
                 return redirect('control_products')
 
-    products = Product.objects.all()
-    return render(request, 'control_products.html', {'products': products, 'form': form})
+    return render(request, 'control_products.html', {**product_listing(request), 'form': form})
 
 @login_required  
 def edit_product(request, product_id):
@@ -200,37 +226,28 @@ def modificar_stock(request, product_id):
     return render(request, 'modificar_stock.html', {'form': form})
 
 def get_product_stock(request, product_id):
-    try:
-        product = Product.objects.get(pk=product_id)
-        stock = product.stock
-        return JsonResponse({'stock': stock})
-    except Product.DoesNotExist:
-        return JsonResponse({'error': 'El producto no existe'}, status=404)
+    stock = stock_cache.get_product_stock(product_id)
+    if stock is None:
+        return FastJsonResponse({'error': 'El producto no existe'}, status=404)
+    return FastJsonResponse({'stock': stock})
 
 @login_required
+@condition(etag_func=inventory_etag)
 def inventory_information_dashboard(request):
-    products = Product.objects.all()
     inventory_entries = InventoryEntry.objects.all().values('product__name', 'quantity_received', 'date_received')
     inventory_exits = InventoryExit.objects.all().values('product__name', 'quantity_sold', 'date_sold')
-    insufficient_stock_products = InsufficientStock.objects.all().values('product__name', 'quantity_needed')
+    insufficient_stock_products = Product.objects.low_stock().order_by('id').values('quantity_needed', product_id=F('id'), product__name=F('name'))
     inventory_entries_list = list(inventory_entries)
     inventory_exits_list = list(inventory_exits)
     insufficient_stock_products_list = list(insufficient_stock_products)
-    products_with_insufficient_stock = []
-    for product in products:
-        stockTotal=0
-        for stock in inventory_exits_list:
-            if product.name == stock['product__name']:
-                stockTotal += stock['quantity_sold']
-        profit = stockTotal * product.price
-        products_with_insufficient_stock.append({'product_name': product.name,'profit': profit,'quantity_sold': stockTotal,'price': product.price}) 
+    products_with_insufficient_stock = product_sales()
     data = {
         'inventory_entries': inventory_entries_list,
         'inventory_exits': inventory_exits_list,
         'insufficient_stock_products': insufficient_stock_products_list,
         'products_with_insufficient_stock': products_with_insufficient_stock
     }
-    return JsonResponse(data)
+    return FastJsonResponse(data)
 
 @login_required     
 def register_inventory_entry(request):
@@ -260,24 +277,47 @@ def register_inventory_exit(request):
         form = InventoryExitForm()
     return render(request, 'register_inventory_exit.html', {'form': form})
 
+#El 304 se decide con la revision vigente, pero la lista servida puede ser la ultima conocida
+#mientras otro proceso la reconstruye: su ETag sale de la revision de esa lista, no de la vigente
 @login_required  
 def inventory_consult_data(request):
-    products = Product.objects.all().values('name', 'stock')
-    productsList = list(products)
+    etag = quote_etag(inventory_etag(request))
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+        return response
+    revision, productsList = stock_cache.get_stock_list_revision()
     data={'inventory': productsList}
-    return JsonResponse(data)
+    response = FastJsonResponse(data)
+    response['ETag'] = quote_etag(INVENTORY_ETAG.format(revision))
+    return response
+
+#Eventos de stock en vivo (Server-Sent Events). Es una vista asincrona de conexion larga que
+#solo se sirve con un servidor ASGI (application.asgi); con WSGI responde 204, que le indica a
+#EventSource que no vuelva a conectar
+async def inventory_events(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return FastJsonResponse({'error': 'No autenticado'}, status=401)
+    if not events.live_events_available(request):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(events.broker.stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required  
 def inventory_consult(request):
     user = request.user
     user_type = user.role_id
-    return render(request, 'inventory_consult.html', {'role_id': user_type})
+    return render(request, 'inventory_consult.html', {'role_id': user_type, 'live_events': events.live_events_available(request)})
 
 @login_required 
 def inventory_information(request):
-    inventory_entries = InventoryEntry.objects.all()
-    inventory_exits = InventoryExit.objects.all()
-    insufficient_stock_products = InsufficientStock.objects.all()
+    #El nombre del producto llega en la misma consulta (JOIN) en lugar de una consulta por fila
+    inventory_entries = InventoryEntry.objects.select_related('product').only('product__name', 'quantity_received', 'date_received')
+    inventory_exits = InventoryExit.objects.select_related('product').only('product__name', 'quantity_sold', 'date_sold')
+    insufficient_stock_products = Product.objects.low_stock().order_by('id').only('name')
     return render(request, 'inventory_information.html', {
         'inventory_entries': inventory_entries,
         'inventory_exits': inventory_exits,
@@ -298,21 +338,34 @@ def register(request):
 @api_view(['POST'])
 def loginapi(request):
     if request.method == 'POST':
+        #Un cuerpo JSON que no es un objeto (lista, numero...) no tiene correo ni contraseña
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Invalid data. Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+        email = request.data.get('email')
+        wait = throttling.take_attempt(request, email)
+        if wait:
+            return Response({'error': 'Too many failed login attempts'}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(wait)})
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
+            throttling.login_succeeded(request, email)
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = InventoryRefreshToken.for_user(user)
             return Response({'email': user.email, 'username': user.username, 'access': str(refresh.access_token)}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+#El perfil lee y guarda la fila completa del usuario, por eso usa autenticacion con la base
+DATABASE_AUTHENTICATION_CLASSES = [SessionAuthentication, BasicAuthentication, DatabaseJWTAuthentication]
+
 class ProfileDetailView(APIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = DATABASE_AUTHENTICATION_CLASSES
     def get(self, request):
         user = request.user
         serializer = CustomUserSerializer(user)
         return Response(serializer.data)
 class ProfileEditView(APIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = DATABASE_AUTHENTICATION_CLASSES
     
     def put(self, request):
         user = request.user
@@ -322,14 +375,20 @@ class ProfileEditView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=400)
     
-class UserListAPIView(APIView):
+#Revoca todos los tokens JWT del usuario (cierra la sesion en todos los dispositivos)
+class LogoutAllAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        get_object_or_404(CustomUser.objects.only('id'), pk=request.user.pk).revoke_tokens()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class UserListAPIView(CursorListMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
         if request.user.role_id != 1:
             return Response({"error": "Unauthorized"}, status=403)
-        users = CustomUser.objects.all()
-        serializer = CustomUserSerializer(users, many=True)
-        return Response(serializer.data)
+        users = CustomUser.objects.only('id', 'email', 'username', 'first_name', 'last_name', 'address', 'role')
+        return self.list_response(request, users, CustomUserSerializer)
 
 class UserEditAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -386,6 +445,32 @@ class ProductCreateAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+class ProductImportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, CSVParser]
+
+    def post(self, request):
+        if not request.user.role_id == 1:
+            return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"error": "A CSV file is required"}, status=status.HTTP_400_BAD_REQUEST)
+            lines = codecs.iterdecode(upload, 'utf-8-sig')
+        else:
+            lines = request.data
+        result = import_products(lines)
+        return Response(result, status=status.HTTP_200_OK if not result['errors'] else status.HTTP_207_MULTI_STATUS)
+
+class ProductExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        response = StreamingHttpResponse(export_products(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="products.csv"'
+        return response
+
 class ProductDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -395,6 +480,7 @@ class ProductDetailAPIView(APIView):
         except Product.DoesNotExist:
             raise Http404
 
+    @method_decorator(condition(etag_func=product_etag))
     def get(self, request, pk):
         product = self.get_object(pk)
         serializer = ProductSerializer(product)
@@ -419,19 +505,57 @@ class ProductDetailAPIView(APIView):
         product.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
     
-class ProductStockAPIView(APIView):
+#Autocompletado del selector de productos de los formularios de entradas y salidas
+class ProductSearchAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get_object(self, pk):
+    def get(self, request):
         try:
-            return Product.objects.get(pk=pk)
-        except Product.DoesNotExist:
-            raise Http404
+            limit = min(int(request.query_params.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"limit": ["Ensure this value is greater than or equal to 1."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": search_products(request.query_params.get('q', ''), limit)})
+
+class ProductStockAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        product = self.get_object(pk)
-        stock = product.stock
+        stock = stock_cache.get_product_stock(pk)
+        if stock is None:
+            raise Http404
         return Response({"stock": stock})
+
+#Stock de varios productos en una peticion: GET ?ids=1,2,3 o POST {"ids": [...]} para cestas grandes
+class ProductStockBatchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        ids = [part for part in request.query_params.get('ids', '').split(',') if part.strip()]
+        return self.stock_response({'ids': ids})
+
+    def post(self, request):
+        return self.stock_response(request.data)
+
+    def stock_response(self, data):
+        serializer = StockBatchSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        product_ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        stocks = stock_cache.get_products_stock(product_ids)
+        return Response({
+            'stock': {str(product_id): stocks[product_id] for product_id in product_ids if product_id in stocks},
+            'missing': [product_id for product_id in product_ids if product_id not in stocks],
+        })
+
+class CacheStatsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.role_id == 1:
+            return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+        return Response(stock_cache.stats())
     
 class InventoryEntryCreateAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -439,9 +563,6 @@ class InventoryEntryCreateAPIView(APIView):
         serializer = InventoryEntrySerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
-            product_id = serializer.validated_data['product'].id
-            quantity_received = serializer.validated_data['quantity_received']
-            product = Product.objects.get(id=product_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -451,29 +572,91 @@ class InventoryExitCreateAPIView(APIView):
         serializer = InventoryExitSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
-            product_id = serializer.validated_data['product'].id
-            quantity_sold = serializer.validated_data['quantity_sold']
-            product = Product.objects.get(id=product_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class InventoryEntryListAPIView(APIView):
+#Escaneo de codigo de barras: resuelve el SKU con el indice en memoria y registra la venta o
+#entrada en la misma peticion
+class ScanAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ScanSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        product_id = sku_index.lookup(data['code'])
+        try:
+            if product_id is None:
+                raise Product.DoesNotExist
+            movement, stock = record_movement(product_id, data['action'], data['quantity'])
+        except Product.DoesNotExist:
+            return Response({"detail": "No Product matches the given code."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'product': product_id,
+            'action': data['action'],
+            'quantity': data['quantity'],
+            'movement': movement.pk,
+            'stock': stock,
+        }, status=status.HTTP_201_CREATED)
+
+def bulk_movements_response(request, ingest):
+    if not isinstance(request.data, list):
+        return Response({"error": "Expected a JSON array or NDJSON body"}, status=status.HTTP_400_BAD_REQUEST)
+    created, errors = ingest(request.data)
+    if not errors:
+        response_status = status.HTTP_201_CREATED
+    elif created:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response({'created': created, 'errors': errors}, status=response_status)
+
+class InventoryEntryBulkCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+    def post(self, request):
+        return bulk_movements_response(request, ingest_entries)
+
+class InventoryExitBulkCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+    def post(self, request):
+        return bulk_movements_response(request, ingest_exits)
+
+class InventoryEntryListAPIView(CursorListMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
         entries = InventoryEntry.objects.all()
-        serializer = InventoryEntrySerializer(entries, many=True)
-        return Response(serializer.data)
+        return self.list_response(request, entries, InventoryEntrySerializer)
 
-class InventoryExitListAPIView(APIView):
+class InventoryExitListAPIView(CursorListMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
         exits = InventoryExit.objects.all()
-        serializer = InventoryExitSerializer(exits, many=True)
-        return Response(serializer.data)
+        return self.list_response(request, exits, InventoryExitSerializer)
+
+class InsufficientStockListAPIView(CursorListMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        insufficient_stocks = Product.objects.low_stock()
+        return self.list_response(request, insufficient_stocks, InsufficientStockSerializer)
+
+#Reportes por rango de fechas leidos de las filas diarias (DailyStockMovement)
+def report_response(request, build_report):
+    serializer = ReportQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = serializer.validated_data
+    results = build_report(params['from'], params['to'], params['granularity'], params.get('product'))
+    return Response({'from': params['from'], 'to': params['to'], 'granularity': params['granularity'], 'results': results})
+
+class SalesReportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        return report_response(request, sales_report)
 
-class InsufficientStockListAPIView(APIView):
+class MovementReportAPIView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        insufficient_stocks = InsufficientStock.objects.all()
-        serializer = InsufficientStockSerializer(insufficient_stocks, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return report_response(request, movement_report)
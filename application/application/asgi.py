@@ -3,6 +3,9 @@ ASGI config for application project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live stock events endpoint (/inventory_events/) keeps connections open and
+needs this ASGI entry point, e.g. ``uvicorn application.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
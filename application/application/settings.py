@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,10 +82,52 @@ DATABASES = {
 
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',  # Con varios procesos usar django.core.cache.backends.redis.RedisCache
+        'LOCATION': 'inventory',
+    }
+}
+
+STOCK_CACHE_TIMEOUT = 300  # Segundos que vive el stock en cache; las escrituras lo invalidan antes
+
+# Usuario de la sesion en cache (app/user_cache.py); USER_CACHE_TIMEOUT = 0 la desactiva
+USER_CACHE_TIMEOUT = 300
+USER_CACHE_LOCAL_TIMEOUT = 5  # Maximo de segundos que otro proceso puede ver un usuario ya modificado
+USER_CACHE_SIZE = 1024
+
+# Limite de intentos de login fallidos (app/throttling.py): (intentos, segundos para recuperarlos)
+LOGIN_THROTTLE_RATES = {'ip': (30, 60), 'email': (5, 300)}
+# Cabecera de un solo valor con la IP real del cliente que escribe el proxy (p. ej. 'HTTP_X_REAL_IP');
+# sin ella se usa REMOTE_ADDR
+LOGIN_THROTTLE_IP_HEADER = os.environ.get('LOGIN_THROTTLE_IP_HEADER') or None
+# Proxies de confianza delante de la aplicacion: la IP se toma de X-Forwarded-For contando desde la derecha
+LOGIN_THROTTLE_TRUSTED_PROXIES = int(os.environ.get('LOGIN_THROTTLE_TRUSTED_PROXIES', 0))
+
+# Metricas por vista (app/metrics.py): cabecera Server-Timing, registro de peticiones lentas con su SQL
+# y las IP que pueden leer /metrics sin sesion de administrador (separadas por comas)
+REQUEST_METRICS_SERVER_TIMING = os.environ.get('REQUEST_METRICS_SERVER_TIMING') == '1'  # Los administradores la reciben siempre
+REQUEST_METRICS_SLOW_SECONDS = 1.0  # None desactiva el registro
+REQUEST_METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('REQUEST_METRICS_ALLOWED_IPS', '').split(',') if ip]
+
+# Sirve las vistas JSON de lectura con sus versiones asincronas (app/async_views.py) bajo ASGI
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
+# Costo del hash de contraseñas; los hashes con otro numero de iteraciones se recalculan en el login
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 720000))
+
+PASSWORD_HASHERS = [
+    'app.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -128,13 +172,24 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app.authentication.StatelessJWTAuthentication',  # JWT sin consulta a la base (claims + token_version)
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Permite acceso a todas las vistas sin autenticación
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.FastJSONRenderer',  # orjson si esta instalado; si no, el JSONRenderer de DRF
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.LedgerCursorPagination',
+    'PAGE_SIZE': 100,  # Tamaño de pagina por defecto, se puede ajustar con ?page_size=
 }
 
+LISTING_PAGE_SIZE = 50  # Filas por pagina en la administracion de productos y usuarios
+LISTING_ESTIMATE_COUNT_THRESHOLD = 100000  # En PostgreSQL, desde cuantas filas estimadas no se hace COUNT(*); None lo desactiva
+
+STREAM_CHUNK_SIZE = 2000  # Filas por lote del cursor del servidor en ?stream=ndjson
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # Define la duración del token de acceso (en este caso, 1 día)
 }
@@ -1,12 +1,31 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from django.shortcuts import redirect
-from app import views
-from app.views import inventory_consult, inventory_consult_data, profile_view, user_administration, control_products, edit_product
-from app.views import InsufficientStockListAPIView, InventoryEntryCreateAPIView, InventoryEntryListAPIView, InventoryExitCreateAPIView, InventoryExitListAPIView, ProductCreateAPIView, ProductDetailAPIView, ProductStockAPIView, UserEditAPIView, UserListAPIView, UserRoleChangeAPIView, get_product_stock, inventory_information, inventory_information_dashboard, login_view, register_inventory_entry, register_inventory_exit,register_view,dashboard_view
+from app import async_views, metrics, views
+from app.views import inventory_consult, inventory_consult_data, inventory_events, profile_view, user_administration, control_products, edit_product
+from app.views import CacheStatsAPIView, InsufficientStockListAPIView, InventoryEntryBulkCreateAPIView, InventoryEntryCreateAPIView, InventoryEntryListAPIView, InventoryExitBulkCreateAPIView, InventoryExitCreateAPIView, InventoryExitListAPIView, LogoutAllAPIView, MovementReportAPIView, ProductCreateAPIView, ProductDetailAPIView, ProductExportAPIView, ProductImportAPIView, ProductSearchAPIView, ProductStockAPIView, ProductStockBatchAPIView, SalesReportAPIView, ScanAPIView, UserEditAPIView, UserListAPIView, UserRoleChangeAPIView, get_product_stock, inventory_information, inventory_information_dashboard, login_view, register_inventory_entry, register_inventory_exit,register_view,dashboard_view
 def redirect_to_login(request):
     return redirect('loginview') 
 
+#Vistas JSON de lectura: asincronas bajo ASGI o sincronas (por defecto)
+if settings.ASYNC_READ_VIEWS:
+    read_views = {
+        'get_product_stock': async_views.get_product_stock,
+        'inventory_consult_data': async_views.inventory_consult_data,
+        'get_tickets': async_views.get_tickets,
+        'get_ticket_details': async_views.get_ticket_details,
+        'product_stock': async_views.product_stock_api,
+    }
+else:
+    read_views = {
+        'get_product_stock': get_product_stock,
+        'inventory_consult_data': inventory_consult_data,
+        'get_tickets': views.get_tickets,
+        'get_ticket_details': views.get_ticket_details,
+        'product_stock': ProductStockAPIView.as_view(),
+    }
+
 urlpatterns = [
     ##Modelos Vistas
     path('admin/', admin.site.urls),
@@ -18,27 +37,42 @@ urlpatterns = [
     path('user-administration/', user_administration, name='user_administration'),
     path('control_products/', control_products, name='control_products'),
     path('edit_product/<int:product_id>/', edit_product, name='edit_product'),
-    path('get_product_stock/<int:product_id>/', get_product_stock, name='get_product_stock'),
+    path('get_product_stock/<int:product_id>/', read_views['get_product_stock'], name='get_product_stock'),
     path('new_inventory/', register_inventory_entry, name='register_inventory_entry'),
     path('sales/', register_inventory_exit, name='register_inventory_exit'),
     path('inventory_information/', inventory_information, name='inventory_information'),
     path('inventory_information_dashboard/', inventory_information_dashboard, name='inventory_information_dashboard'),
     path('inventory_consult/', inventory_consult, name='inventory_consult'),
-    path('inventory_consult_data/', inventory_consult_data, name='inventory_consult_data'),
+    path('inventory_consult_data/', read_views['inventory_consult_data'], name='inventory_consult_data'),
+    path('tickets/', read_views['get_tickets'], name='get_tickets'),
+    path('tickets/<int:ticket_id>/', read_views['get_ticket_details'], name='get_ticket_details'),
+    path('inventory_events/', inventory_events, name='inventory_events'),
+    path('metrics', metrics.metrics_view, name='metrics'),
     ##Modelos de API 
     path('api/register/', views.register, name='register'),
     path('api/login/', views.loginapi, name='login'),
+    path('api/logout/', LogoutAllAPIView.as_view(), name='logout-all'),
     path('api/profile/', views.ProfileDetailView.as_view(), name='profile_detail'),
     path('api/profile/edit/', views.ProfileEditView.as_view(), name='profile_edit'),
     path('api/users/', UserListAPIView.as_view(), name='user-list'),
     path('api/users/<int:pk>/', UserEditAPIView.as_view(), name='user-edit'),
     path('api/users/<int:pk>/change-role/', UserRoleChangeAPIView.as_view(), name='user-change-role'),
     path('api/products/create/', ProductCreateAPIView.as_view(), name='product-create'),
+    path('api/products/import/', ProductImportAPIView.as_view(), name='product-import'),
+    path('api/products/export/', ProductExportAPIView.as_view(), name='product-export'),
+    path('api/products/search/', ProductSearchAPIView.as_view(), name='product-search'),
     path('api/products/<int:pk>/', ProductDetailAPIView.as_view(), name='product-detail'),
-    path('api/products/<int:pk>/stock/', ProductStockAPIView.as_view(), name='product-stock'),
+    path('api/products/stock/', ProductStockBatchAPIView.as_view(), name='product-stock-batch'),
+    path('api/products/<int:pk>/stock/', read_views['product_stock'], name='product-stock'),
     path('api/inventory/entry/create/', InventoryEntryCreateAPIView.as_view(), name='inventory-entry-create'),
     path('api/inventory/exit/create/', InventoryExitCreateAPIView.as_view(), name='inventory-exit-create'),
     path('api/inventory/entries/', InventoryEntryListAPIView.as_view(), name='inventory-entry-list'),
+    path('api/inventory/entries/bulk/', InventoryEntryBulkCreateAPIView.as_view(), name='inventory-entry-bulk'),
     path('api/inventory/exits/', InventoryExitListAPIView.as_view(), name='inventory-exit-list'),
+    path('api/inventory/exits/bulk/', InventoryExitBulkCreateAPIView.as_view(), name='inventory-exit-bulk'),
+    path('api/scan/', ScanAPIView.as_view(), name='scan'),
     path('api/inventory/insufficient/', InsufficientStockListAPIView.as_view(), name='insufficient-stock-list'),
+    path('api/cache/stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
+    path('api/reports/sales/', SalesReportAPIView.as_view(), name='report-sales'),
+    path('api/reports/movements/', MovementReportAPIView.as_view(), name='report-movements'),
 ]